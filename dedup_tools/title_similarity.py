@@ -0,0 +1,439 @@
+import difflib
+import heapq
+import logging
+import math
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# MinHash 排列使用的梅森素数
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+
+def title_shingles(title: str, size: int = 2) -> Set[str]:
+    """
+    将标题切分为字符 n-gram（shingle）集合
+
+    Args:
+        title: 标题文本
+        size: shingle 长度，中文标题默认按 2 字切分
+
+    Returns:
+        Set[str]: shingle 集合，标题短于 size 时返回标题本身
+    """
+    if len(title) <= size:
+        return {title}
+    return {title[i:i + size] for i in range(len(title) - size + 1)}
+
+
+class MinHashLSHIndex:
+    """基于字符 shingle 的 MinHash/LSH 候选索引"""
+
+    def __init__(self, num_perm: int = 64, bands: int = 32, shingle_size: int = 2, seed: int = 1):
+        """
+        Args:
+            num_perm: MinHash 签名长度
+            bands: LSH 分带数，num_perm 必须能被其整除；每带行数越少召回越高
+            shingle_size: 字符 shingle 长度
+            seed: 随机排列种子
+        """
+        if num_perm % bands != 0:
+            raise ValueError(f"num_perm({num_perm}) 必须能被 bands({bands}) 整除")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        # a、b 限制在 2^31 内，保证 a * h + b 不会溢出 uint64
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def signature(self, title: str) -> np.ndarray:
+        """
+        计算标题的 MinHash 签名
+
+        Args:
+            title: 标题文本
+
+        Returns:
+            np.ndarray: 长度为 num_perm 的签名
+        """
+        shingles = title_shingles(title, self.shingle_size)
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode('utf-8')) for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+    def _band_keys(self, title: str) -> List[bytes]:
+        signature = self.signature(title)
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, title: str) -> int:
+        """
+        将标题加入索引
+
+        Args:
+            title: 标题文本
+
+        Returns:
+            int: 标题在索引中的位置（按加入顺序递增）
+        """
+        position = self._size
+        for band, key in zip(self._buckets, self._band_keys(title)):
+            band.setdefault(key, []).append(position)
+        self._size += 1
+        return position
+
+    def query(self, title: str) -> List[int]:
+        """
+        查询与标题落入同一桶的候选位置
+
+        Args:
+            title: 标题文本
+
+        Returns:
+            List[int]: 按加入顺序排列的候选位置
+        """
+        candidates = set()
+        for band, key in zip(self._buckets, self._band_keys(title)):
+            bucket = band.get(key)
+            if bucket:
+                candidates.update(bucket)
+        return sorted(candidates)
+
+
+class ExactTitleMatcher:
+    """逐条使用 SequenceMatcher 比较的标题匹配器（原始实现）"""
+
+    def __init__(self, titles: Optional[Iterable] = None):
+        self.titles: List[str] = []
+        for title in titles or []:
+            self.add(title)
+
+    def add(self, title) -> None:
+        """加入一条已保留的标题"""
+        self.titles.append(str(title).strip())
+
+    def _candidates(self, title: str) -> Iterable[str]:
+        return self.titles
+
+    def prepare(self, queries: List[str], threshold: float) -> None:
+        """
+        批量预计算钩子，在逐条 find 之前以整封邮件的标题调用一次
+
+        Args:
+            queries: 本次将要查询的全部标题
+            threshold: 相似度阈值
+        """
+
+    def find(self, title: str, threshold: float) -> Optional[Tuple[str, float]]:
+        """
+        按加入顺序查找第一个相似度达到阈值的标题
+
+        Args:
+            title: 待比较的标题
+            threshold: 相似度阈值
+
+        Returns:
+            Optional[Tuple[str, float]]: (匹配到的标题, 相似度)，未匹配返回None
+        """
+        for candidate in self._candidates(title):
+            similarity = difflib.SequenceMatcher(None, title, candidate).ratio()
+            if similarity >= threshold:
+                return candidate, similarity
+        return None
+
+
+class LSHTitleMatcher(ExactTitleMatcher):
+    """
+    先用 MinHash/LSH 筛选候选，再对候选做 SequenceMatcher 精确比较
+
+    候选筛选是近似的：SequenceMatcher.ratio() 达到阈值的标题对，其 2 字 shingle 的 Jaccard
+    相似度可能很低，落不进同一个桶。在 output/*.xlsx 的真实标题上（每个文件依次与同类其余文件去重，
+    阈值0.5），默认参数 32 带 × 2 行只找回 378/416 条重复（召回 90.9%），64 带 × 1 行为 415/416，
+    且耗时已超过 CascadeTitleMatcher。需要结果不变时使用 'cascade'；用
+    `python -m dedup_tools.title_similarity` 在真实标题上复核各后端的结果。
+    """
+
+    def __init__(self, titles: Optional[Iterable] = None, **index_options):
+        self.index = MinHashLSHIndex(**index_options)
+        super().__init__(titles)
+
+    def add(self, title) -> None:
+        super().add(title)
+        self.index.add(self.titles[-1])
+
+    def _candidates(self, title: str) -> Iterable[str]:
+        return [self.titles[position] for position in self.index.query(title)]
+
+
+class CascadeTitleMatcher(ExactTitleMatcher):
+    """
+    在 SequenceMatcher.ratio() 之前逐级剪枝的标题匹配器
+
+    各级上界均不小于 ratio()，被剪掉的标题对一定低于阈值，
+    因此匹配结果与 ExactTitleMatcher 完全一致：
+        1. 长度上界 2*min(la, lb)/(la + lb)（即 real_quick_ratio），按长度分桶整批跳过
+        2. quick_ratio 字符多重集交集上界
+        3. ratio 完整计算
+    每个已保留标题缓存一个 set_seq2 过的 SequenceMatcher，避免重复构建 b2j。
+    """
+
+    def __init__(self, titles: Optional[Iterable] = None):
+        self._by_length: Dict[int, List[int]] = {}
+        self._matchers: Dict[int, difflib.SequenceMatcher] = {}
+        self.stats = {'pairs': 0, 'length_pruned': 0, 'quick_pruned': 0, 'ratio_computed': 0}
+        super().__init__(titles)
+
+    def add(self, title) -> None:
+        super().add(title)
+        self._by_length.setdefault(len(self.titles[-1]), []).append(len(self.titles) - 1)
+
+    def _matcher(self, position: int) -> difflib.SequenceMatcher:
+        matcher = self._matchers.get(position)
+        if matcher is None:
+            matcher = difflib.SequenceMatcher(None)
+            matcher.set_seq2(self.titles[position])
+            self._matchers[position] = matcher
+        return matcher
+
+    def _length_candidates(self, title: str, threshold: float) -> Iterable[int]:
+        """按加入顺序返回通过长度上界的标题位置"""
+        la = len(title)
+        if threshold > 1:
+            return iter(())
+        if threshold <= 0:
+            lengths = list(self._by_length)
+        else:
+            # 先按解析式估算长度区间（两端各留一位余量），再逐个长度精确校验上界
+            low = max(0, math.floor(la * threshold / (2 - threshold)) - 1)
+            high = math.ceil(la * (2 - threshold) / threshold) + 1
+            lengths = [
+                lb for lb in range(low, high + 1)
+                if lb in self._by_length and (la + lb == 0 or 2.0 * min(la, lb) / (la + lb) >= threshold)
+            ]
+        return heapq.merge(*(self._by_length[lb] for lb in lengths))
+
+    def find(self, title: str, threshold: float) -> Optional[Tuple[str, float]]:
+        examined = 0
+        match = None
+        match_position = -1
+        for position in self._length_candidates(title, threshold):
+            examined += 1
+            matcher = self._matcher(position)
+            matcher.set_seq1(title)
+            if matcher.quick_ratio() < threshold:
+                self.stats['quick_pruned'] += 1
+                continue
+            self.stats['ratio_computed'] += 1
+            similarity = matcher.ratio()
+            if similarity >= threshold:
+                match = (self.titles[position], similarity)
+                match_position = position
+                break
+
+        # 与逐条扫描等价的比较对数：命中时只计到命中位置为止
+        pairs = match_position + 1 if match else len(self.titles)
+        self.stats['pairs'] += pairs
+        self.stats['length_pruned'] += pairs - examined
+        return match
+
+
+class MatrixTitleMatcher(ExactTitleMatcher):
+    """
+    基于 rapidfuzz.process.cdist 的批量矩阵匹配器
+
+    prepare() 时用多核 C 实现一次性计算整封邮件标题与全部已有标题的相似度矩阵，
+    find() 只做查表。相似度为 rapidfuzz 的 fuzz.ratio（归一化 Indel 距离，
+    即 2*LCS/(la + lb)），与 SequenceMatcher.ratio() 同量纲但不完全相同；
+    返回的是相似度最高的标题，而非第一个达到阈值的标题。
+    """
+
+    def __init__(self, titles: Optional[Iterable] = None, workers: int = -1, chunk_size: int = 256):
+        """
+        Args:
+            titles: 初始标题列表
+            workers: cdist 使用的线程数，-1 表示使用全部 CPU
+            chunk_size: 每次参与 cdist 的查询标题数，用于限制矩阵内存
+        """
+        try:
+            from rapidfuzz import fuzz, process
+        except ImportError as e:
+            raise ImportError("'matrix' 去重后端需要安装 rapidfuzz: pip install rapidfuzz") from e
+        self._fuzz = fuzz
+        self._process = process
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._reset_prepared()
+        super().__init__(titles)
+
+    def _reset_prepared(self) -> None:
+        self._rows: Dict[str, int] = {}
+        self._base_count = 0
+        self._base_best: List[Tuple[int, float]] = []
+        self._query_matrix: Optional[np.ndarray] = None
+        self._added_rows: List[int] = []
+
+    def add(self, title) -> None:
+        super().add(title)
+        row = self._rows.get(self.titles[-1])
+        if row is None:
+            # 加入了未预计算的标题，后续查询退回逐条 extractOne
+            self._reset_prepared()
+        else:
+            self._added_rows.append(row)
+
+    def prepare(self, queries: List[str], threshold: float) -> None:
+        self._reset_prepared()
+        unique_queries = list(dict.fromkeys(queries))
+        if not unique_queries:
+            return
+        self._rows = {query: i for i, query in enumerate(unique_queries)}
+        self._base_count = len(self.titles)
+        score_cutoff = threshold * 100
+
+        # 与已有标题的矩阵按块计算，每行只保留最佳列，避免 n*m 矩阵常驻内存
+        if self.titles:
+            for start in range(0, len(unique_queries), self.chunk_size):
+                chunk = unique_queries[start:start + self.chunk_size]
+                scores = self._process.cdist(
+                    chunk, self.titles, scorer=self._fuzz.ratio,
+                    score_cutoff=score_cutoff, dtype=np.float32, workers=self.workers,
+                )
+                best = scores.argmax(axis=1)
+                self._base_best.extend(zip(best.tolist(), scores[np.arange(len(chunk)), best].tolist()))
+
+        # 查询标题两两之间的矩阵用于邮件内去重，规模只有 n*n
+        self._query_matrix = self._process.cdist(
+            unique_queries, unique_queries, scorer=self._fuzz.ratio,
+            score_cutoff=score_cutoff, dtype=np.float32, workers=self.workers,
+        )
+
+    def find(self, title: str, threshold: float) -> Optional[Tuple[str, float]]:
+        row = self._rows.get(title)
+        if row is None or self._query_matrix is None:
+            if not self.titles:
+                return None
+            result = self._process.extractOne(
+                title, self.titles, scorer=self._fuzz.ratio, score_cutoff=threshold * 100,
+            )
+            return (result[0], result[1] / 100) if result else None
+
+        best_title, best_score = None, 0.0
+        if self._base_best:
+            position, score = self._base_best[row]
+            best_title, best_score = self.titles[position], score
+        if self._added_rows:
+            scores = self._query_matrix[row, self._added_rows]
+            column = int(scores.argmax())
+            if scores[column] > best_score:
+                best_title, best_score = self.titles[self._base_count + column], float(scores[column])
+
+        if best_title is None or best_score < threshold * 100:
+            return None
+        return best_title, best_score / 100
+
+
+TITLE_MATCHER_BACKENDS = {
+    'difflib': ExactTitleMatcher,
+    'lsh': LSHTitleMatcher,
+    'cascade': CascadeTitleMatcher,
+    'matrix': MatrixTitleMatcher,
+}
+
+
+def build_title_matcher(backend: str = 'difflib', titles: Optional[Iterable] = None) -> ExactTitleMatcher:
+    """
+    创建标题匹配器
+
+    Args:
+        backend: 匹配后端 ('difflib': 全量比较, 'lsh': MinHash/LSH 候选筛选,
+                 'cascade': 结果不变的逐级剪枝, 'matrix': rapidfuzz 批量矩阵打分)
+        titles: 初始标题列表
+
+    Returns:
+        ExactTitleMatcher: 标题匹配器实例
+    """
+    if backend not in TITLE_MATCHER_BACKENDS:
+        raise ValueError(f"不支持的去重后端: {backend}，可选: {', '.join(TITLE_MATCHER_BACKENDS)}")
+    return TITLE_MATCHER_BACKENDS[backend](titles)
+
+
+def merge_matcher_stats(*matchers) -> Dict[str, int]:
+    """
+    汇总多个匹配器的剪枝统计
+
+    Args:
+        matchers: 标题匹配器，可为None
+
+    Returns:
+        Dict[str, int]: 各阶段计数之和，没有统计信息时返回空字典
+    """
+    merged: Dict[str, int] = {}
+    for matcher in matchers:
+        for key, value in getattr(matcher, 'stats', {}).items():
+            merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+    import os
+    import time
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description='在 output/*.xlsx 的真实标题上核对各去重后端与 difflib 的结果')
+    parser.add_argument('--files', default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                        'output', '*.xlsx'), help='报表文件通配符')
+    parser.add_argument('--threshold', type=float, default=0.5, help='相似度阈值')
+    parser.add_argument('--every', type=int, default=5, help='每隔几个文件取一个作为待去重批次（1为全部）')
+    args = parser.parse_args()
+
+    # 境内报表取标题，境外报表取标题(译文)
+    batches = []
+    for path in sorted(glob.glob(args.files)):
+        column = '标题' if '境内' in os.path.basename(path) else '标题(译文)'
+        titles = pd.read_excel(path, usecols=[column])[column].dropna().astype(str).str.strip()
+        batches.append(('境内' in os.path.basename(path), [title for title in titles if title]))
+    if not batches:
+        raise SystemExit(f"没有找到报表文件: {args.files}")
+
+    def duplicate_flags(backend):
+        """每个批次依次与同类其余文件的标题去重，返回各标题是否判为重复"""
+        flags = []
+        for i, (domestic, batch) in enumerate(batches):
+            if i % args.every:
+                continue
+            existing = [title for j, (other, titles) in enumerate(batches)
+                        if other == domestic and j != i for title in titles]
+            matcher = build_title_matcher(backend, existing)
+            flags.extend(matcher.find(title, args.threshold) is not None for title in batch)
+        return flags
+
+    start = time.perf_counter()
+    expected = duplicate_flags('difflib')
+    print(f"difflib: 保留 {expected.count(False)} 条，重复 {expected.count(True)} 条，{time.perf_counter() - start:.1f}s")
+    for backend in ('cascade', 'lsh'):
+        start = time.perf_counter()
+        actual = duplicate_flags(backend)
+        found = sum(1 for e, a in zip(expected, actual) if e and a)
+        mismatches = sum(1 for e, a in zip(expected, actual) if e != a)
+        print(f"{backend}: 保留 {actual.count(False)} 条，重复 {actual.count(True)} 条，"
+              f"召回 {found}/{expected.count(True)}，不一致 {mismatches} 条，{time.perf_counter() - start:.1f}s")
+        if backend == 'cascade':
+            assert actual == expected, "cascade 后端的去重结果与 difflib 不一致"
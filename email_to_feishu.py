@@ -86,49 +86,34 @@ def map_email_data_to_feishu(df, category):
     返回:
         飞书格式的数据列表 [{'字段1': 值1, '字段2': 值2, ...}, ...]
     """
-    feishu_data = []
-    
     # 只处理境外数据
     if category != 1:
-        return feishu_data
+        return []
+    
+    # 按列取出已知字段，缺失值（NaN、pd.NA）统一为None
+    columns = {}
+    for email_col, feishu_col in email_to_feishu_map.items():
+        if email_col not in df.columns:
+            continue
+        values = df[email_col].astype(object)
+        values = values.where(df[email_col].notna(), None)
+        # 处理Link类型字段 - 动态来源，Link类型需要对象格式，这里使用网站名称作为文本
+        if feishu_col == '动态来源':
+            present = values.fillna('').astype(bool)
+            columns[feishu_col] = [{"text": str(value), "link": ""} if ok else None
+                                   for value, ok in zip(values, present)]
+        else:
+            columns[feishu_col] = values.tolist()
     
-    for index, row in df.iterrows():
-        item = {}
-        
-        # 映射已知字段
-        for email_col, feishu_col in email_to_feishu_map.items():
-            if email_col in row:
-                value = row[email_col]
-                
-                # 处理Link类型字段 - 动态来源
-                if feishu_col == '动态来源':
-                    if pd.notna(value) and value:
-                        # Link类型需要对象格式，这里使用网站名称作为文本
-                        item[feishu_col] = {
-                            "text": str(value),
-                            "link": ""
-                        }
-                    else:
-                        item[feishu_col] = None
-                # 普通字段直接赋值
-                else:
-                    item[feishu_col] = value
-        
-        # 设置固定字段
-        item['提报日期'] = None
-        item['内容类型'] = '动态'
-        # 设置默认的审核人文本字段
-        item['审核人文本'] = '王林宝'
-        
-        # 为缺失的飞数字段设置默认值，跳过提报人字段
-        for field in feishu_fields:
-            if field not in item:
-                if field != '提报人 (人员 )':
-                    item[field] = None
-        
-        feishu_data.append(item)
+    # 固定字段，以及为缺失的飞书字段设置默认值（跳过提报人字段）
+    constants = {'提报日期': None, '内容类型': '动态', '审核人文本': '王林宝'}
+    for field in feishu_fields:
+        if field not in columns and field not in constants and field != '提报人 (人员 )':
+            constants[field] = None
     
-    return feishu_data
+    names = list(columns)
+    rows = zip(*columns.values()) if columns else [()] * len(df)
+    return [dict(zip(names, values), **constants) for values in rows]
 
 
 # 修改主程序逻辑，为每个邮件单独生成表格
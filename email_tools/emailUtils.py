@@ -7,9 +7,16 @@ from email.mime.base import MIMEBase
 from email import encoders
 import io
 import re 
+import base64
+import quopri
+from urllib.parse import unquote
 from datetime import timedelta
 import pandas as pd
 import smtplib
+from .csv_arrow import read_csv_with_hyperlinks
+from .email_data import EmailData, TableAttachment
+from .ingest_ledger import attachment_digest
+from .xlsx_stream import read_sheet_with_hyperlinks
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email.mime.text import MIMEText
@@ -54,25 +61,113 @@ def decode_subject(encoded_subject):
     return ''.join(subject_parts)
 
 
-def process_email(mail, email_id):
-    """处理单封邮件，提取标题和表格附件"""
-    # 获取邮件完整内容
-    status, data = mail.fetch(email_id, '(RFC822)')
-    if status != 'OK':
-        return None, "获取邮件内容失败"
+# 需要解析的表格附件扩展名
+TABLE_EXTENSIONS = ('.xlsx', '.xls', '.csv')
 
-    # 解析邮件
-    msg = email.message_from_bytes(data[0][1])
+
+def detect_category(decoded_filename):
+    """根据附件文件名识别数据类别 (0: 境内数据, 1: 境外数据, None: 无法识别)"""
+    if '境外' in decoded_filename or '国外' in decoded_filename:
+        return 1
+    elif '境内' in decoded_filename or '国内' in decoded_filename:
+        return 0
+    return None
+
+
+def parse_email_headers(msg):
+    """
+    解析邮件头中的标题、发件人和接收时间
+
+    返回:
+        tuple: (subject, from_email, received_date, time_slot)
+    """
     subject = decode_subject(msg['Subject'])
     from_email = parseaddr(msg['From'])[1]
-    
+
     # 获取邮件接收时间
     received_date = parsedate_to_datetime(msg.get('Date'))
     # 计算前一天日期
     previous_day = (received_date - timedelta(days=1))
     time_slot = previous_day.strftime('%Y-%m-%d') + '-' + received_date.strftime('%Y-%m-%d')
+    return subject, from_email, received_date, time_slot
+
+
+def process_email(mail, email_id, partial=False, ledger=None, projections=None, defer_parse=False):
+    """
+    处理单封邮件，提取标题和表格附件
+
+    参数:
+        mail: imaplib.IMAP4_SSL 对象
+        email_id: 邮件ID
+        partial: 为True时先拉取BODYSTRUCTURE和邮件头，只下载需要的表格附件（不改变已读状态）
+        ledger: IngestionLedger 对象，已入库的附件不再解析
+        projections: 按分类的列投影 {category: {'columns': [...], 'renames': {...}}}，见 DataConfig.table_projections
+        defer_parse: 为True时不解析表格，只返回附件原始内容，交给 AttachmentParsePool 解析
+    """
+    if partial:
+        return process_email_partial(mail, email_id, ledger=ledger, projections=projections,
+                                     defer_parse=defer_parse)
+
+    # 获取邮件完整内容
+    status, data = mail.fetch(email_id, '(RFC822)')
+    if status != 'OK':
+        return None, "获取邮件内容失败"
+
+    # 解析邮件
+    return parse_email_message(email.message_from_bytes(data[0][1]), email_id, ledger=ledger,
+                               projections=projections, defer_parse=defer_parse)
+
+
+def _parse_projected(attachment_content, filename, category, projections):
+    """按附件分类选取列投影后解析表格"""
+    projection = (projections or {}).get(category) or {}
+    return parse_table_attachment(attachment_content, filename,
+                                  columns=projection.get('columns'), renames=projection.get('renames'))
+
+
+def _table_entry(attachment_content, filename, category, sha256, projections=None, defer_parse=False):
+    """
+    解析表格附件并组装 tables 中的一项（TableAttachment），解析失败时返回None
+
+    defer_parse 为True时不在当前进程解析，只保留附件原始内容（raw）和分类，
+    由 AttachmentParsePool 在进程池中解析后写入 dataframe。
+    """
+    if defer_parse:
+        return TableAttachment(filename, sha256=sha256, category=category, raw=attachment_content)
+    df = _parse_projected(attachment_content, filename, category, projections)
+    if df is None:
+        return None
+    return TableAttachment(filename, sha256=sha256, category=category, dataframe=df)
+
+
+def _ledger_skips(ledger, attachment_content, decoded_filename):
+    """计算附件摘要，台账中已有时返回 (sha256, True)"""
+    sha256 = attachment_digest(attachment_content)
+    if ledger is not None and ledger.has_attachment(sha256):
+        print(f"【附件已入库，跳过: {decoded_filename}】")
+        return sha256, True
+    return sha256, False
+
+
+def parse_email_message(msg, email_id, ledger=None, projections=None, defer_parse=False):
+    """
+    从完整的邮件对象中提取标题和表格附件
+
+    参数:
+        msg: email.message.Message 对象
+        email_id: 邮件ID（序号或UID）
+        ledger: IngestionLedger 对象，已入库的附件不再解析
+        projections: 按分类的列投影，为None时保留全部列
+        defer_parse: 为True时不解析表格，只返回附件原始内容
+    """
+    subject, from_email, received_date, time_slot = parse_email_headers(msg)
+    message_id = (msg.get('Message-ID') or '').strip()
 
     tables = []
+    skipped_attachments = 0
+    if ledger is not None and ledger.has_message(message_id):
+        return EmailData(email_id, message_id, subject, from_email, received_date, time_slot,
+                         tables, skipped_attachments, None), "【邮件已入库，跳过】"
 
     # 遍历邮件部分，查找表格附件
     for part in msg.walk():
@@ -87,50 +182,490 @@ def process_email(mail, email_id):
             continue
 
         # 解码文件名
-        # 修复category判断逻辑
         decoded_filename = decode_subject(filename)
-        # 问题在这里：当前的条件判断写法是错误的，'境外'或'国外'被当作了单独的布尔表达式
-        # 正确的写法应该是使用 'in' 操作符来检查字符串是否包含特定子串
-        if '境外' in decoded_filename or '国外' in decoded_filename:
-            category = 1
-        elif '境内' in decoded_filename or '国内' in decoded_filename:
-            category = 0
-        else:
-            # 可以设置一个默认值或根据需求处理
-            category = None  # 或者根据实际情况设置为0或1
+        category = detect_category(decoded_filename)
+        if category is None:
             print('无法识别分类')
             exit()
 
         # 检查是否为表格文件
-        if any(decoded_filename.endswith(ext) for ext in ['.xlsx', '.xls', '.csv']):
+        if any(decoded_filename.endswith(ext) for ext in TABLE_EXTENSIONS):
             # 读取附件内容
             attachment_content = part.get_payload(decode=True)
             if attachment_content:
-                df = parse_table_attachment(attachment_content, decoded_filename)
-                if df is not None:
-                    tables.append({
-                        'filename': decoded_filename,
-                        'dataframe': df,
-                        'content': df.to_string()  # 转换为字符串以便打印
-                    })
+                sha256, skipped = _ledger_skips(ledger, attachment_content, decoded_filename)
+                if skipped:
+                    skipped_attachments += 1
+                    continue
+                table = _table_entry(attachment_content, decoded_filename, category, sha256,
+                                     projections=projections, defer_parse=defer_parse)
+                if table is not None:
+                    tables.append(table)
                 else: exit()
 
+    return EmailData(email_id, message_id, subject, from_email, received_date, time_slot,
+                     tables, skipped_attachments, category), "【邮件解析成功】"
+
+
+_IMAP_TOKEN = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|\{(\d+)\}\r?\n?$|([^\s()"]+))')
+
+
+def _parse_imap_response(parts):
+    """
+    将 imaplib 返回的 FETCH 响应解析为嵌套列表
+
+    参数:
+        parts: mail.fetch 返回的数据列表，元素为 bytes 或 (前缀, 字面量) 元组
+
+    返回:
+        list: 每封邮件一个嵌套列表，NIL 解析为None，字符串保持为bytes
+    """
+    # 展开为 (文本, 紧随其后的字面量) 序列
+    segments = []
+    for part in parts:
+        if isinstance(part, tuple):
+            segments.append((part[0], part[1]))
+        elif part is not None:
+            segments.append((part, None))
+
+    stack = [[]]
+    for text, literal in segments:
+        pos = 0
+        while pos < len(text):
+            match = _IMAP_TOKEN.match(text, pos)
+            if not match or match.end() == pos:
+                break
+            pos = match.end()
+            open_paren, close_paren, quoted, literal_size, atom = match.groups()
+            if open_paren:
+                stack.append([])
+            elif close_paren:
+                finished = stack.pop()
+                stack[-1].append(finished)
+            elif quoted is not None:
+                stack[-1].append(re.sub(rb'\\(.)', rb'\1', quoted))
+            elif literal_size is not None:
+                stack[-1].append(literal if literal is not None else b'')
+            elif atom is not None:
+                stack[-1].append(None if atom.upper() == b'NIL' else atom)
+    return stack[0]
+
+
+def _fetch_items(parsed):
+    """将 `序号 (KEY VALUE ...)` 形式的解析结果转换为 {KEY: VALUE} 字典"""
+    items = {}
+    for value in parsed:
+        if isinstance(value, list):
+            for key, item in zip(value[::2], value[1::2]):
+                if isinstance(key, bytes):
+                    items[key.decode('ascii', errors='replace').upper()] = item
+    return items
+
+
+def _text(value):
+    return value.decode('utf-8', errors='replace') if isinstance(value, bytes) else value
+
+
+def _structure_params(params):
+    """将 BODYSTRUCTURE 中的参数列表转换为字典，合并 RFC 2231 的 filename*0* 续行"""
+    if not isinstance(params, list):
+        return {}
+    raw = {}
+    for key, value in zip(params[::2], params[1::2]):
+        if isinstance(key, bytes):
+            raw[_text(key).lower()] = _text(value) or ''
+
+    result = {}
+    continued = {}
+    for key, value in raw.items():
+        if '*' not in key:
+            result[key] = value
+            continue
+        name, _, rest = key.partition('*')
+        section = rest.rstrip('*')
+        encoded = key.endswith('*')
+        continued.setdefault(name, []).append((int(section) if section.isdigit() else 0, encoded, value))
+    for name, pieces in continued.items():
+        pieces.sort()
+        charset = None
+        text_parts = []
+        for index, encoded, value in pieces:
+            if encoded:
+                if index == 0 and value.count("'") >= 2:
+                    charset, _, value = value.split("'", 2)
+                value = unquote(value, encoding=charset or 'utf-8', errors='replace')
+            text_parts.append(value)
+        result[name] = ''.join(text_parts)
+    return result
+
+
+def _iter_structure_parts(structure, prefix=''):
+    """
+    遍历 BODYSTRUCTURE，返回每个叶子部分的段号和描述
+
+    返回:
+        generator: (section, info) 其中 info 包含 type/subtype/encoding/filename
+    """
+    if not isinstance(structure, list) or not structure:
+        return
+    if isinstance(structure[0], list):
+        # multipart：子部分在前，随后是子类型
+        index = 0
+        for child in structure:
+            if not isinstance(child, list):
+                break
+            index += 1
+            yield from _iter_structure_parts(child, f'{prefix}{index}.')
+        return
+
+    section = prefix.rstrip('.') or '1'
+    main_type = (_text(structure[0]) or '').lower()
+    sub_type = (_text(structure[1]) or '').lower()
+    params = _structure_params(structure[2] if len(structure) > 2 else None)
+    encoding = (_text(structure[5]) or '7bit').lower() if len(structure) > 5 else '7bit'
+
+    # 扩展字段位置：基本字段7个，text 多 lines，message/rfc822 多 envelope/body/lines
+    extension_start = 7
+    if main_type == 'text':
+        extension_start += 1
+    elif main_type == 'message' and sub_type == 'rfc822':
+        extension_start += 3
+    disposition = structure[extension_start + 1] if len(structure) > extension_start + 1 else None
+    if not isinstance(disposition, list):
+        # 个别服务器省略 lines 等字段时，按形如 ("attachment" (...)) 的列表查找
+        disposition = next((field for field in structure[7:] if isinstance(field, list) and field
+                            and isinstance(field[0], bytes)
+                            and field[0].lower() in (b'attachment', b'inline')), None)
+    disposition_params = {}
+    if isinstance(disposition, list) and len(disposition) > 1:
+        disposition_params = _structure_params(disposition[1])
+
+    filename = disposition_params.get('filename') or params.get('name')
+    yield section, {
+        'type': main_type,
+        'subtype': sub_type,
+        'encoding': encoding,
+        'filename': decode_subject(filename) if filename else None,
+    }
+
+
+def _decode_part_payload(payload, encoding):
+    """按 Content-Transfer-Encoding 解码附件内容"""
+    if encoding == 'base64':
+        return base64.b64decode(payload)
+    if encoding == 'quoted-printable':
+        return quopri.decodestring(payload)
+    return payload
+
+
+def _split_fetch_response(data):
+    """将一次 FETCH 的响应按邮件拆分，每封邮件的片段以 `序号 (` 开头"""
+    messages = []
+    for part in data:
+        head = part[0] if isinstance(part, tuple) else part
+        if head is None:
+            continue
+        if re.match(rb'\d+ \(', head) or not messages:
+            messages.append([])
+        messages[-1].append(part)
+    return messages
+
+
+def _plan_attachment_sections(items):
+    """
+    根据 BODYSTRUCTURE 挑出需要下载的表格附件部分
+
+    返回:
+        list: [(section, info, category)]，文件名为 .xlsx/.xls/.csv 且能识别境内/境外
+    """
+    wanted = []
+    for section, info in _iter_structure_parts(items.get('BODYSTRUCTURE')):
+        filename = info['filename']
+        if not filename or not filename.endswith(TABLE_EXTENSIONS):
+            continue
+        category = detect_category(filename)
+        if category is None:
+            continue
+        wanted.append((section, info, category))
+    return wanted
+
+
+def _section_fetch_spec(wanted):
+    return '(' + ' '.join(f'BODY.PEEK[{section}]' for section, _, _ in wanted) + ')'
+
+
+def _header_message(header_items):
+    return email.message_from_bytes(header_items.get('BODY[HEADER]') or b'')
+
+
+def _message_done(ledger, header_items):
+    """台账中该邮件的全部附件都已入库时返回True"""
+    if ledger is None:
+        return False
+    message_id = (_header_message(header_items).get('Message-ID') or '').strip()
+    return ledger.has_message(message_id)
+
+
+def _build_partial_email(email_id, header_items, bodies, wanted, ledger=None, projections=None, defer_parse=False):
+    """由邮件头、附件部分内容组装与 process_email 相同格式的邮件数据"""
+    msg = _header_message(header_items)
+    subject, from_email, received_date, time_slot = parse_email_headers(msg)
+    message_id = (msg.get('Message-ID') or '').strip()
+
+    tables = []
+    skipped_attachments = 0
+    category = None
+    for section, info, part_category in wanted:
+        payload = bodies.get(f'BODY[{section}]')
+        if not payload:
+            continue
+        attachment_content = _decode_part_payload(payload, info['encoding'])
+        sha256, skipped = _ledger_skips(ledger, attachment_content, info['filename'])
+        if skipped:
+            skipped_attachments += 1
+            continue
+        table = _table_entry(attachment_content, info['filename'], part_category, sha256,
+                             projections=projections, defer_parse=defer_parse)
+        if table is None:
+            exit()
+        category = part_category
+        tables.append(table)
+
+    status_msg = "【邮件解析成功】"
+    if ledger is not None and not wanted and ledger.has_message(message_id):
+        status_msg = "【邮件已入库，跳过】"
+
+    return EmailData(email_id, message_id, subject, from_email, received_date, time_slot,
+                     tables, skipped_attachments, category), status_msg
+
+
+def process_email_partial(mail, email_id, ledger=None, projections=None, defer_parse=False):
+    """
+    按需拉取单封邮件：先取 BODYSTRUCTURE 和邮件头，再用 BODY.PEEK 只下载
+    文件名为 .xlsx/.xls/.csv 且包含境内/境外/国内/国外 的附件部分。
+    PEEK 不会给邮件打上 \\Seen 标记；台账中已完成的邮件不再下载附件。
+    """
+    status, data = mail.fetch(email_id, '(BODYSTRUCTURE BODY.PEEK[HEADER])')
+    if status != 'OK':
+        return None, "获取邮件结构失败"
+
+    items = _fetch_items(_parse_imap_response(data))
+    wanted = [] if _message_done(ledger, items) else _plan_attachment_sections(items)
+
+    bodies = {}
+    if wanted:
+        status, data = mail.fetch(email_id, _section_fetch_spec(wanted))
+        if status != 'OK':
+            return None, "获取邮件附件失败"
+        bodies = _fetch_items(_parse_imap_response(data))
+
+    return _build_partial_email(email_id, items, bodies, wanted, ledger=ledger, projections=projections,
+                                defer_parse=defer_parse)
+
+
+def search_mail_uids(mail, from_address):
+    """搜索指定发件人的未读邮件，返回UID而不是序号"""
+    status, messages = mail.uid('SEARCH', 'CHARSET', 'UTF-8', 'UNSEEN', 'FROM', f'"{from_address}"')
+    return status, messages
+
+
+def search_mail_uids_since(mail, from_address, last_uid):
+    """
+    搜索指定发件人UID大于 last_uid 的邮件（不论是否已读）
+
+    新邮件的UID一定大于 last_uid，不再附加 MODSEQ 条件：它不能缩小结果，
+    在对 CONDSTORE 搜索支持不完善的服务器上反而可能漏掉邮件。
+
+    参数:
+        mail: imaplib.IMAP4_SSL 对象
+        from_address: 发件人地址
+        last_uid: 上次处理到的UID
+
+    返回:
+        tuple: (status, uids)，uids 为 bytes 列表
+    """
+    status, messages = mail.uid('SEARCH', 'CHARSET', 'UTF-8', 'UID', f'{int(last_uid) + 1}:*',
+                                'FROM', f'"{from_address}"')
+    if status != 'OK':
+        return status, []
+    uids = messages[0].split() if messages and messages[0] else []
+    # `n:*` 在没有新邮件时也会返回当前最大的UID，需要过滤
+    return status, [uid for uid in uids if int(uid) > int(last_uid)]
+
+
+def mailbox_status(mail, mailbox='INBOX'):
+    """
+    查询邮箱的 UIDVALIDITY / UIDNEXT，支持 CONDSTORE 时一并返回 HIGHESTMODSEQ
+
+    返回:
+        dict: {'uidvalidity': int, 'uidnext': int, 'highestmodseq': int 或 None}
+    """
+    condstore = 'CONDSTORE' in getattr(mail, 'capabilities', ())
+    names = '(UIDVALIDITY UIDNEXT HIGHESTMODSEQ)' if condstore else '(UIDVALIDITY UIDNEXT)'
+    status, data = mail.status(mailbox, names)
+    if status != 'OK' or not data or not data[0]:
+        raise imaplib.IMAP4.error(f"查询邮箱状态失败: {data}")
+    values = {key.decode().lower(): int(value) for key, value in re.findall(rb'([A-Z]+) (\d+)', data[0])}
     return {
-        'email_id': email_id,
-        'subject': subject,
-        'from_email': from_email,
-        'received_date': received_date,
-        'time_slot': time_slot, 
-        'tables': tables,
-        'category': category
-    }, "【邮件解析成功】"
-
-
-def parse_table_attachment(attachment_content, filename):
-    """解析表格附件内容"""
+        'uidvalidity': values.get('uidvalidity'),
+        'uidnext': values.get('uidnext'),
+        'highestmodseq': values.get('highestmodseq'),
+    }
+
+
+def build_uid_set(uids):
+    """
+    将UID列表压缩为 IMAP 序列集合，如 [1, 2, 3, 7, 9, 10] -> '1:3,7,9:10'
+
+    参数:
+        uids: UID列表（int、bytes 或 str）
+    """
+    numbers = sorted({int(uid) for uid in uids})
+    ranges = []
+    for number in numbers:
+        if ranges and number == ranges[-1][1] + 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return ','.join(str(start) if start == end else f'{start}:{end}' for start, end in ranges)
+
+
+def _uid_fetch(mail, uids, spec):
+    """
+    对一组UID发起一次 UID FETCH，返回 {uid: {KEY: VALUE}}
+
+    参数:
+        mail: imaplib.IMAP4_SSL 对象
+        uids: UID列表
+        spec: FETCH 数据项，如 '(BODY.PEEK[])'
+    """
+    if not spec.startswith('(UID '):
+        spec = '(UID ' + spec[1:]
+    status, data = mail.uid('FETCH', build_uid_set(uids), spec)
+    if status != 'OK':
+        raise RuntimeError(f"UID FETCH 失败: {data}")
+    results = {}
+    for segments in _split_fetch_response(data):
+        items = _fetch_items(_parse_imap_response(segments))
+        uid = items.get('UID')
+        if uid is not None:
+            results[int(uid)] = items
+    return results
+
+
+def fetch_emails_by_uid(mail, uids, partial=True, batch_size=50, ledger=None, projections=None,
+                        defer_parse=False):
+    """
+    按UID批量拉取并解析邮件，逐封产出结果
+
+    每批邮件只需一次 UID FETCH（partial 模式下为一次取结构、再按附件段号分组各取一次），
+    而不是每封邮件一次往返；解析在迭代时按需进行。
+
+    参数:
+        mail: imaplib.IMAP4_SSL 对象
+        uids: search_mail_uids 返回的UID列表
+        partial: 为True时只下载需要的表格附件部分，否则下载完整邮件
+        batch_size: 每次 FETCH 的邮件数
+        ledger: IngestionLedger 对象，已入库的邮件和附件直接跳过
+        projections: 按分类的列投影，为None时保留全部列
+        defer_parse: 为True时不解析表格，只返回附件原始内容，交给 AttachmentParsePool 解析
+
+    返回:
+        generator: (uid, email_data, status_msg)，email_data 为 None 时表示该邮件拉取或解析失败
+    """
+    uids = [int(uid) for uid in uids]
+    for start in range(0, len(uids), batch_size):
+        batch = uids[start:start + batch_size]
+        try:
+            if partial:
+                structures = _uid_fetch(mail, batch, '(BODYSTRUCTURE BODY.PEEK[HEADER])')
+                plans = {
+                    uid: [] if _message_done(ledger, items) else _plan_attachment_sections(items)
+                    for uid, items in structures.items()
+                }
+                # 附件段号相同的邮件合并到同一次 FETCH
+                groups = {}
+                for uid, wanted in plans.items():
+                    if wanted:
+                        groups.setdefault(_section_fetch_spec(wanted), []).append(uid)
+                bodies = {}
+                for spec, group in groups.items():
+                    bodies.update(_uid_fetch(mail, group, spec))
+            else:
+                messages = _uid_fetch(mail, batch, '(BODY.PEEK[])')
+        except Exception as e:
+            for uid in batch:
+                yield uid, None, f"【批量获取邮件失败】: {str(e)}"
+            continue
+
+        # 每封邮件解析完即从批次缓存中移除，原始内容不会保留到整批结束
+        for uid in batch:
+            try:
+                if partial:
+                    if uid not in structures:
+                        yield uid, None, "获取邮件结构失败"
+                        continue
+                    yield (uid,) + _build_partial_email(uid, structures.pop(uid), bodies.pop(uid, {}), plans[uid],
+                                                        ledger=ledger, projections=projections,
+                                                        defer_parse=defer_parse)
+                else:
+                    raw = messages.pop(uid, {}).get('BODY[]')
+                    if not raw:
+                        yield uid, None, "获取邮件内容失败"
+                        continue
+                    yield (uid,) + parse_email_message(email.message_from_bytes(raw), uid, ledger=ledger,
+                                                       projections=projections, defer_parse=defer_parse)
+            except Exception as e:
+                yield uid, None, f"【邮件解析异常】: {str(e)}"
+
+
+def project_columns(df, columns=None, renames=None):
+    """
+    对已解析的表格做列投影：先重命名，再一次性选取目标列并把缺失列补为空字符串
+
+    参数:
+        df: pd.DataFrame
+        columns: 目标列名列表，为None时保留全部列
+        renames: 列重命名映射，如 {'作者名': '公众号名称'}
+
+    返回:
+        pd.DataFrame: 投影后的数据
+    """
+    if renames:
+        df = df.rename(columns=renames)
+    if columns is None:
+        return df
+    # 同名列只保留第一个，与流式读取的投影保持一致
+    df = df.loc[:, ~df.columns.duplicated()]
+    return df.reindex(columns=list(columns), fill_value='')
+
+
+def parse_table_attachment(attachment_content, filename, columns=None, renames=None):
+    """
+    解析表格附件内容
+
+    参数:
+        attachment_content: 附件内容（bytes）
+        filename: 附件文件名
+        columns: 列投影，只保留这些列（按重命名后的名称），缺失列填充为空字符串；为None时保留全部列
+        renames: 列重命名映射，如 {'作者名': '公众号名称'}
+    """
     try:
         # 支持Excel和CSV格式
         if filename.endswith('.xlsx') or filename.endswith('.xls'):
+            # 流式读取"去重后文章"工作表，只解析需要的 XML 部件，保留文章链接地址的超链接
+            try:
+                df = read_sheet_with_hyperlinks(attachment_content, "去重后文章", header_row=2, link_column='文章链接地址',
+                                                columns=columns, renames=renames)
+                print(f"【选择工作簿: 去重后文章】")
+                print(f"【成功解析表格: {filename}, 共{len(df)}行数据】")
+                return df
+            except KeyError:
+                print(f"【未找到名为'去重后文章'工作簿】")
+                return None
+            except Exception as e:
+                print(f"【流式解析失败，改用openpyxl完整加载: {str(e)}】")
+
             # 使用openpyxl引擎读取Excel文件以获取超链接
             from openpyxl import load_workbook
             wb = load_workbook(io.BytesIO(attachment_content), data_only=False)  # data_only=False才能读取公式
@@ -163,16 +698,32 @@ def parse_table_attachment(attachment_content, filename):
                 data.append(row_data)
             
             # 创建DataFrame
-            df = pd.DataFrame(data, columns=headers)
+            df = project_columns(pd.DataFrame(data, columns=headers), columns, renames)
         elif filename.endswith('.csv'):
-            # 读取CSV文件
-            df = pd.read_csv(io.BytesIO(attachment_content), header=1)
+            # 优先用 pyarrow 多线程读取，字符串列以 Arrow 格式存储，超链接地址向量化提取
+            try:
+                df = read_csv_with_hyperlinks(attachment_content, header_row=2, link_column='文章链接地址',
+                                              columns=columns, renames=renames)
+                print(f"【成功解析表格: {filename}, 共{len(df)}行数据】")
+                return df
+            except ImportError:
+                pass
+            except Exception as e:
+                print(f"【Arrow解析CSV失败，改用pandas读取: {str(e)}】")
+
+            # 读取CSV文件，有列投影时不需要的列直接不读取
+            usecols = None
+            if columns is not None:
+                wanted = set(columns)
+                usecols = lambda name: (renames or {}).get(name, name) in wanted
+            df = pd.read_csv(io.BytesIO(attachment_content), header=1, usecols=usecols)
             
             # 修改：查找'文章链接地址'列而不是'原文链接'
             if '文章链接地址' in df.columns:
                 # 解析CSV中的超链接格式（如=HYPERLINK("url","text")）
                 url_pattern = re.compile(r'HYPERLINK\("([^"]+)",')
                 df['文章链接地址'] = df['文章链接地址'].apply(lambda x: url_pattern.search(str(x)).group(1) if url_pattern.search(str(x)) else x)
+            df = project_columns(df, columns, renames)
         else:
             return None, f"不支持的表格格式: {filename}"
         print(f"【成功解析表格: {filename}, 共{len(df)}行数据】")
@@ -240,4 +791,30 @@ def mark_email_as_read(mail, email_id):
         return True
     except Exception as e:
         print(f"【标记邮件 {email_id} 为已读失败: {str(e)}】")
-        return False
\ No newline at end of file
+        return False
+
+
+def mark_emails_as_read_by_uid(mail, uids):
+    """
+    按UID将邮件标记为已读，多封邮件只需一次 UID STORE
+
+    参数:
+        mail: imaplib.IMAP4_SSL 对象
+        uids: UID列表
+
+    返回:
+        bool: 如果标记成功返回True，否则返回False
+    """
+    uid_set = build_uid_set(uids)
+    if not uid_set:
+        return True
+    try:
+        status, _ = mail.uid('STORE', uid_set, '+FLAGS', '(\\Seen)')
+        if status != 'OK':
+            print(f"【标记邮件 {uid_set} 为已读失败】")
+            return False
+        print(f"【邮件 {uid_set} 已标记为已读】")
+        return True
+    except Exception as e:
+        print(f"【标记邮件 {uid_set} 为已读失败: {str(e)}】")
+        return False
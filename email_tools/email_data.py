@@ -0,0 +1,90 @@
+# 表格预览（content）最多显示的行数和单元格宽度
+PREVIEW_ROWS = 20
+PREVIEW_COLWIDTH = 50
+
+
+class _FieldAccess:
+    """按键读取字段，兼容原来以 dict 形式传递的 email_data / table"""
+
+    __slots__ = ()
+    _fields = ()
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def get(self, key, default=None):
+        if key not in self._fields:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        return self._fields
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self._fields
+                           if name not in ('dataframe', 'content', 'tables'))
+        return f'{type(self).__name__}({fields})'
+
+
+class TableAttachment(_FieldAccess):
+    """
+    邮件中的一个表格附件
+
+    解析前只持有附件原始内容（raw），attach() 写入 DataFrame 后立即释放原始内容；
+    content 是按需生成的表格预览，不再为每个表格渲染完整正文。
+    """
+
+    __slots__ = ('filename', 'sha256', 'category', 'dataframe', 'raw')
+    _fields = ('filename', 'dataframe', 'content', 'sha256', 'category')
+
+    def __init__(self, filename, sha256=None, category=None, dataframe=None, raw=None):
+        self.filename = filename
+        self.sha256 = sha256
+        self.category = category
+        self.dataframe = dataframe
+        self.raw = raw
+
+    @property
+    def parsed(self):
+        return self.dataframe is not None
+
+    def attach(self, dataframe):
+        """写入解析结果并释放原始内容"""
+        self.dataframe = dataframe
+        self.raw = None
+
+    @property
+    def content(self):
+        """表格预览，仅在访问时渲染前后若干行"""
+        if self.dataframe is None:
+            return ''
+        return self.dataframe.to_string(max_rows=PREVIEW_ROWS, max_colwidth=PREVIEW_COLWIDTH)
+
+
+class EmailData(_FieldAccess):
+    """
+    解析后的邮件数据
+
+    只保留邮件头中用到的字段和表格附件，不持有 email.message 对象和原始邮件内容。
+    """
+
+    __slots__ = ('email_id', 'message_id', 'subject', 'from_email', 'received_date', 'time_slot',
+                 'tables', 'skipped_attachments', 'category')
+    _fields = __slots__
+
+    def __init__(self, email_id, message_id, subject, from_email, received_date, time_slot,
+                 tables=None, skipped_attachments=0, category=None):
+        self.email_id = email_id
+        self.message_id = message_id
+        self.subject = subject
+        self.from_email = from_email
+        self.received_date = received_date
+        self.time_slot = time_slot
+        self.tables = tables if tables is not None else []
+        self.skipped_attachments = skipped_attachments
+        self.category = category
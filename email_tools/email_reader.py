@@ -1,9 +1,10 @@
 import pandas as pd
-from .emailUtils import connect_mail, select_mail, search_mail, process_email
+from .emailUtils import connect_mail, select_mail, search_mail, search_mail_uids, process_email, fetch_emails_by_uid
 import logging
-import difflib
 import os
 
+from dedup_tools.title_similarity import build_title_matcher, merge_matcher_stats
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -63,6 +64,28 @@ class DataConfig:
             0: '微信',
             1: '境外媒体'
         }
+        
+        # 列重命名映射：境内数据的作者名对应公众号名称
+        self.column_renames = {
+            0: {'作者名': '公众号名称'},
+            1: {}
+        }
+
+    def table_projections(self, extra_columns=()):
+        """
+        按类别生成解析表格附件时使用的列投影
+
+        参数:
+            extra_columns: 目标列之外还需要保留的列
+
+        返回:
+            dict: {category: {'columns': [...], 'renames': {...}}}
+        """
+        projections = {}
+        for category, target_columns in ((0, self.gn_target_columns), (1, self.gw_target_columns)):
+            columns = list(dict.fromkeys(list(target_columns) + list(extra_columns)))
+            projections[category] = {'columns': columns, 'renames': self.column_renames.get(category, {})}
+        return projections
 
 
 class EmailProcessor:
@@ -125,7 +148,7 @@ class EmailProcessor:
             logger.error(f"【搜索邮件异常】: {str(e)}")
             return []
     
-    def deduplicate_by_title_similarity(self, df, title_column='标题', threshold=0.8):
+    def deduplicate_by_title_similarity(self, df, title_column='标题', threshold=0.8, backend='difflib'):
         """
         根据标题相似度去重
         
@@ -133,6 +156,8 @@ class EmailProcessor:
             df: 原始DataFrame
             title_column: 标题列名
             threshold: 相似度阈值，超过此阈值认为是重复
+            backend: 标题匹配后端，'cascade' 与 'difflib' 结果一致但跳过大部分 ratio() 计算，
+                     'matrix' 使用 rapidfuzz 批量矩阵打分
         
         返回:
             去重后的DataFrame
@@ -151,24 +176,20 @@ class EmailProcessor:
             # 记录需要保留的行索引
             to_keep = []
             # 记录已经处理过的标题
-            processed_titles = []
+            processed_matcher = build_title_matcher(backend)
+            current_titles = df[title_column].astype(str).str.strip().tolist()
+            processed_matcher.prepare(current_titles, threshold)
             
-            for idx, row in df.iterrows():
-                current_title = str(row[title_column]).strip()
-                
+            for idx, current_title in zip(df.index, current_titles):
                 # 检查是否与已处理的标题相似
-                is_duplicate = False
-                for processed_title in processed_titles:
-                    similarity = difflib.SequenceMatcher(None, current_title, processed_title).ratio()
-                    if similarity >= threshold:
-                        is_duplicate = True
-                        break
-                
-                if not is_duplicate:
+                if processed_matcher.find(current_title, threshold) is None:
                     to_keep.append(idx)
-                    processed_titles.append(current_title)
+                    processed_matcher.add(current_title)
             
             deduplicated_df = df.loc[to_keep].reset_index(drop=True)
+            stats = merge_matcher_stats(processed_matcher)
+            if stats:
+                logger.info(f"【标题相似度剪枝统计】: {stats}")
             logger.info(f"【标题相似度去重完成】: 从 {len(df)} 条记录中去重后保留 {len(deduplicated_df)} 条")
             return deduplicated_df
         except Exception as e:
@@ -176,13 +197,61 @@ class EmailProcessor:
             return df
 
 
+    def search_email_uids(self):
+        """搜索指定发件人的未读邮件，返回UID列表"""
+        logger.info("3. 查找未读邮件")
+        try:
+            search_status, messages = search_mail_uids(self.mail, self.email_config.from_address)
+            if search_status == 'OK':
+                email_uids = messages[0].split() if messages and messages[0] else []
+                logger.info(f"【找到 {len(email_uids)} 封未读邮件】")
+                return email_uids
+            else:
+                logger.error("【搜索失败】")
+                return []
+        except Exception as e:
+            logger.error(f"【搜索邮件异常】: {str(e)}")
+            return []
+
+    def search_new_email_uids(self, checkpoint):
+        """
+        按UID检查点搜索新邮件，不依赖未读状态
+
+        参数:
+            checkpoint: UIDCheckpoint 对象
+        """
+        logger.info("3. 查找检查点之后的新邮件")
+        try:
+            email_uids = checkpoint.search_new_uids(self.mail, self.email_config.from_address)
+            logger.info(f"【找到 {len(email_uids)} 封新邮件】")
+            return email_uids
+        except Exception as e:
+            logger.error(f"【搜索邮件异常】: {str(e)}")
+            return []
+
+    def fetch_emails(self, email_uids, partial=True, batch_size=50, ledger=None, projections=None,
+                     defer_parse=False):
+        """
+        按UID批量拉取邮件，逐封产出 (uid, email_data, status_msg)
+
+        参数:
+            email_uids: search_email_uids 返回的UID列表
+            partial: 为True时只下载需要的表格附件部分
+            batch_size: 每次 FETCH 的邮件数
+            ledger: IngestionLedger 对象，已入库的邮件和附件直接跳过
+            projections: 按分类的列投影，见 DataConfig.table_projections
+            defer_parse: 为True时不解析表格，只返回附件原始内容，交给 AttachmentParsePool 解析
+        """
+        return fetch_emails_by_uid(self.mail, email_uids, partial=partial, batch_size=batch_size,
+                                   ledger=ledger, projections=projections, defer_parse=defer_parse)
+
     def process_single_email(self, email_id):
         """处理单封邮件"""
         logger.info("=======读取邮件========")
         logger.info("4-1 邮件解析:")
         
         try:
-            email_data, status_msg = process_email(self.mail, email_id)
+            email_data, status_msg = process_email(self.mail, email_id, partial=True)
             logger.info(f"\n{status_msg}")
             
             if not email_data:
@@ -219,7 +288,7 @@ class EmailProcessor:
             
             # 根据标题相似度去重
             if not email_df.empty:
-                email_df = self.deduplicate_by_title_similarity(email_df)
+                email_df = self.deduplicate_by_title_similarity(email_df, backend='cascade')
             
             # 保存表格到本地
             if not email_df.empty:
@@ -281,10 +350,18 @@ class EmailProcessor:
         
         logger.info("\n=====所有邮件处理完成======")
     
-    def process_email(self, email_id):
-        """处理邮件并返回邮件数据"""
+    def process_email(self, email_id, partial=False, ledger=None, projections=None):
+        """
+        处理邮件并返回邮件数据
+
+        参数:
+            email_id: 邮件ID
+            partial: 为True时只下载需要的表格附件部分
+            ledger: IngestionLedger 对象，已入库的附件不再解析
+            projections: 按分类的列投影，见 DataConfig.table_projections
+        """
         from .emailUtils import process_email as utils_process_email
-        return utils_process_email(self.mail, email_id)
+        return utils_process_email(self.mail, email_id, partial=partial, ledger=ledger, projections=projections)
 
 
 def main():
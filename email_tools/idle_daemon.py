@@ -0,0 +1,188 @@
+import imaplib
+import logging
+import re
+import select
+import ssl
+import threading
+import time
+
+from .email_reader import EmailProcessor
+
+logger = logging.getLogger(__name__)
+
+
+# 新邮件到达时服务器推送的未标记响应
+_NEW_MAIL_RESPONSE = re.compile(rb'\* \d+ (EXISTS|RECENT)\b')
+
+
+def _has_buffered_data(mail):
+    """
+    检查是否已有可读数据而无需等待 select
+
+    imaplib 从带缓冲的 mail.file 读取响应行，与 '+ idling' 同一次读到的 EXISTS 等后续响应
+    留在缓冲区（或 SSL 层）中，socket 上不再可读。这里以非阻塞方式 peek 一次。
+    """
+    timeout = mail.sock.gettimeout()
+    mail.sock.settimeout(0)
+    try:
+        return bool(mail.file.peek(1))
+    except (BlockingIOError, ssl.SSLWantReadError):
+        return False
+    finally:
+        mail.sock.settimeout(timeout)
+
+
+def imap_idle(mail, timeout, stop_event=None):
+    """
+    在已选中邮箱的连接上进入 IMAP IDLE，直到有新邮件、超时或收到停止信号
+
+    imaplib 在 Python 3.14 之前没有 IDLE 命令，这里直接收发协议行。
+
+    参数:
+        mail: imaplib.IMAP4_SSL 对象（已选中邮箱）
+        timeout: 本次 IDLE 最长等待秒数，超时后退出以便重新进入（服务器约30分钟会断开空闲 IDLE）
+        stop_event: threading.Event，被设置时尽快退出
+
+    返回:
+        bool: 收到 EXISTS/RECENT 通知时返回True，超时或停止时返回False
+    """
+    tag = mail._new_tag()
+    mail.send(tag + b' IDLE\r\n')
+    response = mail.readline()
+    if not response.startswith(b'+'):
+        raise mail.error(f"服务器不支持IDLE: {response!r}")
+
+    has_new_mail = False
+    deadline = time.monotonic() + timeout
+    while not has_new_mail:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or (stop_event is not None and stop_event.is_set()):
+            break
+        # mail.file 和 SSL 层已缓冲的数据 select 感知不到，先检查缓冲区
+        if not _has_buffered_data(mail):
+            readable, _, _ = select.select([mail.sock], [], [], min(remaining, 1.0))
+            if not readable:
+                continue
+        line = mail.readline()
+        if not line:
+            raise mail.abort("IDLE 期间连接被服务器关闭")
+        if _NEW_MAIL_RESPONSE.match(line):
+            has_new_mail = True
+
+    # 结束 IDLE，读取到对应的标记响应为止
+    mail.send(b'DONE\r\n')
+    while True:
+        line = mail.readline()
+        if not line:
+            raise mail.abort("结束 IDLE 时连接被服务器关闭")
+        if line.startswith(tag):
+            if not line[len(tag):].lstrip().startswith(b'OK'):
+                raise mail.error(f"IDLE 结束失败: {line!r}")
+            break
+        if _NEW_MAIL_RESPONSE.match(line):
+            has_new_mail = True
+    return has_new_mail
+
+
+class IdleIngestionDaemon:
+    """
+    常驻的邮件推送接收进程
+
+    基于 EmailProcessor 保持一个处于 IDLE 状态的连接，收到新邮件通知后立即
+    按UID拉取并交给 handler 处理（解析 -> 去重 -> 写入飞书），随后重新进入 IDLE。
+    连接异常时按指数退避自动重连。
+    """
+
+    def __init__(self, email_config, data_config, handler, idle_timeout=300,
+                 reconnect_delay=5, max_reconnect_delay=300, checkpoint=None, ledger=None, projections=None):
+        """
+        参数:
+            email_config: EmailConfig 对象
+            data_config: DataConfig 对象
+            handler: 处理函数 handler(uid, email_data, status_msg)，返回False或抛出异常视为处理失败
+            idle_timeout: 单次 IDLE 的最长秒数，到期后重新进入 IDLE
+            reconnect_delay: 首次重连等待秒数
+            max_reconnect_delay: 重连等待的最大秒数
+            checkpoint: UIDCheckpoint 对象，为None时按未读邮件搜索
+            ledger: IngestionLedger 对象，已入库的邮件和附件直接跳过
+            projections: 按分类的列投影，见 DataConfig.table_projections
+        """
+        self.email_config = email_config
+        self.data_config = data_config
+        self.handler = handler
+        self.idle_timeout = idle_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.checkpoint = checkpoint
+        self.ledger = ledger
+        self.projections = projections
+        self._stop = threading.Event()
+        # 本进程已处理过的UID，PEEK 拉取不会改变未读状态，检查点停留时也不会重复处理
+        self._processed_uids = set()
+
+    def stop(self):
+        """请求停止，当前 IDLE 会在一秒内退出"""
+        self._stop.set()
+
+    def _connect(self):
+        processor = EmailProcessor(self.email_config, self.data_config)
+        if not processor.login():
+            raise imaplib.IMAP4.error("邮箱登录失败")
+        if not processor.select_inbox():
+            raise imaplib.IMAP4.error("选择收件箱失败")
+        return processor
+
+    def _drain(self, processor):
+        """处理当前所有尚未处理的未读邮件"""
+        if self.checkpoint is not None:
+            candidates = processor.search_new_email_uids(self.checkpoint)
+        else:
+            candidates = processor.search_email_uids()
+        email_uids = [uid for uid in candidates if int(uid) not in self._processed_uids]
+        if email_uids:
+            logger.info(f"【收到 {len(email_uids)} 封新邮件】")
+        emails = processor.fetch_emails(email_uids, ledger=self.ledger, projections=self.projections)
+        for uid, email_data, status_msg in emails:
+            try:
+                ok = self.handler(uid, email_data, status_msg) is not False
+            except Exception as e:
+                logger.error(f"【处理邮件 {uid} 异常】: {str(e)}")
+                ok = False
+            if email_data is None or not ok:
+                # 拉取、处理或上传失败的邮件不计入已处理，检查点停在其之前，下次收到通知时重试
+                if self.checkpoint is not None:
+                    self.checkpoint.mark_failed(uid)
+                continue
+            self._processed_uids.add(int(uid))
+            if self.checkpoint is not None:
+                self.checkpoint.advance(uid)
+        if self.checkpoint is not None:
+            self.checkpoint.complete()
+
+    def run(self):
+        """阻塞运行，直到调用 stop()"""
+        delay = self.reconnect_delay
+        while not self._stop.is_set():
+            processor = None
+            try:
+                processor = self._connect()
+                delay = self.reconnect_delay
+                # 启动或重连后先处理积压的邮件
+                self._drain(processor)
+                logger.info("【进入IDLE，等待新邮件】")
+                while not self._stop.is_set():
+                    if imap_idle(processor.mail, self.idle_timeout, self._stop):
+                        self._drain(processor)
+            except (imaplib.IMAP4.abort, imaplib.IMAP4.error, OSError) as e:
+                if self._stop.is_set():
+                    break
+                logger.error(f"【IMAP连接异常】: {str(e)}，{delay} 秒后重连")
+                self._stop.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+            finally:
+                if processor is not None and processor.mail is not None:
+                    try:
+                        processor.mail.logout()
+                    except Exception:
+                        pass
+        logger.info("【IDLE守护进程已停止】")
@@ -0,0 +1,281 @@
+import imaplib
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .emailUtils import fetch_emails_by_uid, mark_emails_as_read_by_uid, search_mail_uids, select_mail
+
+logger = logging.getLogger(__name__)
+
+
+class PooledConnection:
+    """连接池中的一个 IMAP 会话"""
+
+    def __init__(self, mail):
+        self.mail = mail
+        self.last_used = time.monotonic()
+        self.broken = False
+
+
+class IMAPConnectionPool:
+    """
+    已登录 IMAP 会话的连接池
+
+    借出连接前做健康检查（空闲超过 keepalive_interval 时发送 NOOP），
+    连接断开时自动重连并重新选中收件箱；后台线程定期对空闲连接发送 NOOP 保活。
+    对外提供与 EmailProcessor 相同的 login / select_inbox / search_email_uids /
+    process_email / mark_email_as_read 操作，fetch_emails 由多个连接并行拉取和解析。
+    """
+
+    def __init__(self, email_config, size=3, keepalive_interval=60, timeout=30):
+        """
+        参数:
+            email_config: EmailConfig 对象
+            size: 连接数
+            keepalive_interval: 空闲连接保活间隔秒数
+            timeout: 单个连接的 socket 超时秒数
+        """
+        self.email_config = email_config
+        self.size = size
+        self.keepalive_interval = keepalive_interval
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._mailbox = None
+        self._closed = threading.Event()
+        self._keepalive_thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _open(self):
+        """新建一个已登录（并已选中邮箱）的会话，失败时抛出异常"""
+        mail = imaplib.IMAP4_SSL(self.email_config.server, self.email_config.port, timeout=self.timeout)
+        mail.login(self.email_config.address, self.email_config.password)
+        if self._mailbox:
+            status, msgs = mail.select(self._mailbox)
+            if status != 'OK':
+                raise imaplib.IMAP4.error(f"选择邮箱失败: {msgs}")
+        return PooledConnection(mail)
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.mail.logout()
+        except Exception:
+            pass
+
+    def _is_alive(self, conn):
+        """空闲过久的连接发送 NOOP 检查是否仍然可用"""
+        if conn.broken:
+            return False
+        if time.monotonic() - conn.last_used < self.keepalive_interval:
+            return True
+        try:
+            status, _ = conn.mail.noop()
+            return status == 'OK'
+        except (imaplib.IMAP4.abort, imaplib.IMAP4.error, OSError):
+            return False
+
+    @contextmanager
+    def connection(self):
+        """
+        借出一个可用连接，用完后归还
+
+        with 块内抛出连接类异常或将 conn.broken 置为True 时，该连接会被丢弃，下次借出时重连。
+        """
+        conn = self._idle.get()
+        try:
+            if not self._is_alive(conn):
+                logger.warning("【IMAP连接已断开，重新连接】")
+                self._discard(conn)
+                conn.broken = True
+                conn = self._open()
+            yield conn
+        except (imaplib.IMAP4.abort, OSError):
+            conn.broken = True
+            raise
+        finally:
+            conn.last_used = time.monotonic()
+            self._idle.put(conn)
+
+    def _keepalive_loop(self):
+        while not self._closed.wait(self.keepalive_interval):
+            for _ in range(self._idle.qsize()):
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    if time.monotonic() - conn.last_used >= self.keepalive_interval:
+                        conn.mail.noop()
+                        conn.last_used = time.monotonic()
+                except Exception:
+                    conn.broken = True
+                finally:
+                    self._idle.put(conn)
+
+    def login(self):
+        """建立并登录全部连接，至少一个成功即返回True"""
+        logger.info("1. 执行邮箱登陆")
+        opened = 0
+        for _ in range(self.size):
+            try:
+                self._idle.put(self._open())
+                opened += 1
+            except Exception as e:
+                logger.error(f"【登陆异常】: {str(e)}")
+        if not opened:
+            logger.error("【登陆失败，请检查邮箱和密码】")
+            return False
+        logger.info(f"【成功】建立 {opened} 个IMAP连接")
+        if self._keepalive_thread is None:
+            self._keepalive_thread = threading.Thread(target=self._keepalive_loop, daemon=True)
+            self._keepalive_thread.start()
+        return True
+
+    def select_inbox(self):
+        """所有连接选中收件箱，之后重连的连接也会自动选中"""
+        logger.info("2. 执行选中收件箱")
+        self._mailbox = 'INBOX'
+        # 一次借出全部空闲连接，逐个选中
+        connections = []
+        while True:
+            try:
+                connections.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            for conn in connections:
+                status, msgs = select_mail(conn.mail)
+                if status != 'OK':
+                    logger.error(f"【失败】: {msgs}")
+                    return False
+            logger.info("【成功】")
+            return True
+        except Exception as e:
+            logger.error(f"【选择收件箱异常】: {str(e)}")
+            return False
+        finally:
+            for conn in connections:
+                self._idle.put(conn)
+
+    def search_email_uids(self):
+        """搜索指定发件人的未读邮件，返回UID列表（UID在各连接间通用）"""
+        logger.info("3. 查找未读邮件")
+        try:
+            with self.connection() as conn:
+                search_status, messages = search_mail_uids(conn.mail, self.email_config.from_address)
+            if search_status == 'OK':
+                email_uids = messages[0].split() if messages and messages[0] else []
+                logger.info(f"【找到 {len(email_uids)} 封未读邮件】")
+                return email_uids
+            logger.error("【搜索失败】")
+            return []
+        except Exception as e:
+            logger.error(f"【搜索邮件异常】: {str(e)}")
+            return []
+
+    # 与 EmailProcessor 保持相同的调用方式
+    search_emails = search_email_uids
+
+    def search_new_email_uids(self, checkpoint):
+        """
+        按UID检查点搜索新邮件，不依赖未读状态
+
+        参数:
+            checkpoint: UIDCheckpoint 对象
+        """
+        logger.info("3. 查找检查点之后的新邮件")
+        try:
+            with self.connection() as conn:
+                email_uids = checkpoint.search_new_uids(conn.mail, self.email_config.from_address)
+            logger.info(f"【找到 {len(email_uids)} 封新邮件】")
+            return email_uids
+        except Exception as e:
+            logger.error(f"【搜索邮件异常】: {str(e)}")
+            return []
+
+    def _fetch_batch(self, batch, partial, ledger=None, projections=None, defer_parse=False):
+        """在一个连接上拉取并解析一批邮件，批量获取失败时重连后重试一次"""
+        for attempt in range(2):
+            with self.connection() as conn:
+                results = list(fetch_emails_by_uid(conn.mail, batch, partial=partial,
+                                                   batch_size=len(batch), ledger=ledger,
+                                                   projections=projections, defer_parse=defer_parse))
+                failed = any(email_data is None and status_msg.startswith('【批量获取邮件失败】')
+                             for _, email_data, status_msg in results)
+                if not failed:
+                    return results
+                conn.broken = True
+            if attempt == 0:
+                logger.warning("【批量获取邮件失败，重连后重试】")
+        return results
+
+    def fetch_emails(self, email_uids, partial=True, batch_size=10, ledger=None, projections=None,
+                     defer_parse=False):
+        """
+        多个连接并行拉取、解码邮件，按输入顺序逐封产出 (uid, email_data, status_msg)
+
+        参数:
+            email_uids: UID列表
+            partial: 为True时只下载需要的表格附件部分
+            batch_size: 每个工作线程一次 FETCH 的邮件数
+            ledger: IngestionLedger 对象，已入库的邮件和附件直接跳过
+            projections: 按分类的列投影，见 DataConfig.table_projections
+            defer_parse: 为True时不解析表格，只返回附件原始内容，交给 AttachmentParsePool 解析
+        """
+        batches = [email_uids[i:i + batch_size] for i in range(0, len(email_uids), batch_size)]
+        if not batches:
+            return
+        workers = min(self.size, len(batches))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        pending = deque()
+        try:
+            # 同时在途的批次不超过连接数，下游消费慢时不会把整轮邮件的附件都先下载到内存
+            for batch in batches:
+                if len(pending) >= workers:
+                    yield from pending.popleft().result()
+                pending.append(executor.submit(self._fetch_batch, batch, partial, ledger, projections, defer_parse))
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # 调用方提前结束时取消尚未开始的批次，只等待正在拉取的批次归还连接
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def process_email(self, email_id, partial=True, ledger=None, projections=None):
+        """
+        处理单封邮件并返回邮件数据
+
+        参数:
+            email_id: 邮件UID
+            partial: 为True时只下载需要的表格附件部分
+            ledger: IngestionLedger 对象，已入库的附件不再解析
+            projections: 按分类的列投影，见 DataConfig.table_projections
+        """
+        for _, email_data, status_msg in self._fetch_batch([email_id], partial, ledger, projections):
+            return email_data, status_msg
+        return None, "获取邮件内容失败"
+
+    def mark_email_as_read(self, email_id):
+        """将指定UID的邮件标记为已读"""
+        with self.connection() as conn:
+            return mark_emails_as_read_by_uid(conn.mail, [email_id])
+
+    def close(self):
+        """停止保活线程并登出全部连接"""
+        self._closed.set()
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
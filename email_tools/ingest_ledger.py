@@ -0,0 +1,141 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# 默认台账文件位置：项目根目录下的 cache 目录
+DEFAULT_LEDGER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'ingestion_ledger.sqlite3'
+)
+
+
+def attachment_digest(content):
+    """附件内容的 SHA-256 十六进制摘要，作为台账的附件键"""
+    return hashlib.sha256(content).hexdigest()
+
+
+class LedgerSnapshot:
+    """台账键集合的只读快照，可传给子进程做跳过判断"""
+
+    def __init__(self, attachments, messages):
+        self._attachments = frozenset(attachments)
+        self._messages = frozenset(messages)
+
+    def has_attachment(self, sha256):
+        return sha256 in self._attachments
+
+    def has_message(self, message_id):
+        return bool(message_id) and message_id in self._messages
+
+
+class IngestionLedger:
+    """
+    已入库附件的本地台账
+
+    以附件内容的 SHA-256 为键记录处理结果（解析行数、创建记录数、record_id），
+    同一份报表被重跑、转发或在中途崩溃后重跑时都能直接跳过已完成的附件。
+    邮件级别按 Message-ID 记录，全部附件完成的邮件连附件都无需下载。
+    """
+
+    def __init__(self, db_path=DEFAULT_LEDGER_PATH):
+        """
+        参数:
+            db_path: SQLite文件路径，传入 ':memory:' 时仅在内存中保存
+        """
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS attachments (
+                sha256 TEXT PRIMARY KEY,
+                message_id TEXT,
+                filename TEXT,
+                rows_parsed INTEGER,
+                records_created INTEGER,
+                record_ids TEXT,
+                processed_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                message_id TEXT PRIMARY KEY,
+                subject TEXT,
+                processed_at REAL
+            );
+        """)
+        self._conn.commit()
+        # 常驻内存的键集合，查询为 O(1)
+        self._attachments = {row[0] for row in self._conn.execute("SELECT sha256 FROM attachments")}
+        self._messages = {row[0] for row in self._conn.execute("SELECT message_id FROM messages")}
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def snapshot(self):
+        """当前已入库键集合的快照（SQLite 连接不能跨进程共享）"""
+        with self._lock:
+            return LedgerSnapshot(self._attachments, self._messages)
+
+    def has_attachment(self, sha256):
+        """附件是否已成功入库"""
+        return sha256 in self._attachments
+
+    def has_message(self, message_id):
+        """邮件的全部附件是否都已成功入库"""
+        return bool(message_id) and message_id in self._messages
+
+    def get_attachment(self, sha256):
+        """
+        查询附件的处理结果
+
+        返回:
+            dict: 包含 message_id/filename/rows_parsed/records_created/record_ids，未入库时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT message_id, filename, rows_parsed, records_created, record_ids "
+                "FROM attachments WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'message_id': row[0],
+            'filename': row[1],
+            'rows_parsed': row[2],
+            'records_created': row[3],
+            'record_ids': json.loads(row[4] or '[]'),
+        }
+
+    def record_attachment(self, sha256, message_id, filename, rows_parsed, records_created, record_ids):
+        """记录一个附件已成功入库"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO attachments "
+                    "(sha256, message_id, filename, rows_parsed, records_created, record_ids, processed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (sha256, message_id, filename, rows_parsed, records_created,
+                     json.dumps(list(record_ids)), time.time()),
+                )
+            self._attachments.add(sha256)
+
+    def record_message(self, message_id, subject=None):
+        """记录一封邮件的全部附件都已成功入库"""
+        if not message_id:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO messages (message_id, subject, processed_at) VALUES (?, ?, ?)",
+                    (message_id, subject, time.time()),
+                )
+            self._messages.add(message_id)
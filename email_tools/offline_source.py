@@ -0,0 +1,109 @@
+import email
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .emailUtils import parse_email_message
+from .parse_pool import process_context
+
+logger = logging.getLogger(__name__)
+
+
+def iter_message_paths(source):
+    """
+    列出离线邮件文件
+
+    参数:
+        source: 单个 .eml 文件、Maildir 目录（含 cur/new）或任意包含 .eml 文件的目录
+
+    返回:
+        list: 按路径排序的邮件文件列表
+    """
+    if os.path.isfile(source):
+        return [source]
+
+    if os.path.isdir(os.path.join(source, 'cur')) or os.path.isdir(os.path.join(source, 'new')):
+        paths = []
+        for sub_dir in ('cur', 'new'):
+            folder = os.path.join(source, sub_dir)
+            if os.path.isdir(folder):
+                paths.extend(os.path.join(folder, name) for name in os.listdir(folder)
+                             if not name.startswith('.'))
+        return sorted(paths)
+
+    paths = []
+    for root, _, files in os.walk(source):
+        paths.extend(os.path.join(root, name) for name in files if name.lower().endswith('.eml'))
+    return sorted(paths)
+
+
+def parse_message_file(path, ledger=None, projections=None):
+    """
+    解析单个邮件文件，复用 process_email 的解析逻辑
+
+    参数:
+        path: 邮件文件路径
+        ledger: 台账快照（LedgerSnapshot），已入库的附件不再解析
+        projections: 按分类的列投影，见 DataConfig.table_projections
+
+    返回:
+        tuple: (path, email_data, status_msg)
+    """
+    try:
+        with open(path, 'rb') as f:
+            msg = email.message_from_bytes(f.read())
+        return (path,) + parse_email_message(msg, path, ledger=ledger, projections=projections)
+    except SystemExit:
+        # parse_email_message 遇到无法识别的附件时会调用 exit()，离线模式只跳过该文件
+        return path, None, "【无法识别附件分类】"
+    except Exception as e:
+        return path, None, f"【邮件解析异常】: {str(e)}"
+
+
+# 子进程中的台账快照和列投影，由进程池 initializer 设置一次，不随每个任务重复序列化
+_worker_ledger = None
+_worker_projections = None
+
+
+def _init_worker(ledger, projections):
+    global _worker_ledger, _worker_projections
+    _worker_ledger = ledger
+    _worker_projections = projections
+
+
+def _parse_message_file_task(path):
+    return parse_message_file(path, ledger=_worker_ledger, projections=_worker_projections)
+
+
+def iter_offline_emails(source, workers=None, ledger=None, projections=None, max_pending=16):
+    """
+    多进程解析离线邮件，按文件顺序逐封产出 (path, email_data, status_msg)
+
+    同时在途（已提交、未产出）的文件数不超过 max_pending，下游消费慢时解析结果不会在父进程中堆积。
+
+    参数:
+        source: .eml 文件、Maildir 目录或包含 .eml 文件的目录
+        workers: 进程数，默认为CPU核数
+        ledger: IngestionLedger 对象，已入库的邮件和附件直接跳过
+        projections: 按分类的列投影，见 DataConfig.table_projections
+        max_pending: 同时在途的文件数上限
+    """
+    paths = iter_message_paths(source)
+    logger.info(f"【找到 {len(paths)} 封离线邮件】")
+    if not paths:
+        return
+    snapshot = ledger.snapshot() if ledger is not None else None
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=process_context(),
+                                   initializer=_init_worker, initargs=(snapshot, projections))
+    pending = deque()
+    try:
+        for path in paths:
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+            pending.append(executor.submit(_parse_message_file_task, path))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # 调用方提前结束时取消尚未开始的解析任务
+        executor.shutdown(wait=True, cancel_futures=True)
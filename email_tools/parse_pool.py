@@ -0,0 +1,147 @@
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .emailUtils import parse_table_attachment
+
+logger = logging.getLogger(__name__)
+
+
+def process_context():
+    """
+    进程池使用的启动方式
+
+    进程池在流水线线程中首次提交任务时才创建子进程，此时 IMAP 连接池、保活、重复记录写入和
+    SQLite 等线程都已运行；fork 会复制它们可能持有的锁（logging、ssl、sqlite）导致子进程死锁，
+    因此使用 forkserver（不支持时用 spawn）。
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+def _to_ipc(df):
+    """DataFrame 序列化为 Arrow IPC 流，回传主进程时比 pickle 逐个对象更快"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _from_ipc(payload):
+    """Arrow IPC 流还原为 DataFrame，列使用 pd.ArrowDtype"""
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(payload).read_all().to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def _parse_attachment(task):
+    """
+    子进程中解析单个表格附件
+
+    返回:
+        tuple: (格式, 数据)，格式为 'ipc' 或 'frame'；解析失败时返回None
+    """
+    content, filename, projection, arrow_ipc = task
+    df = parse_table_attachment(content, filename,
+                                columns=projection.get('columns'), renames=projection.get('renames'))
+    if df is None:
+        return None
+    if arrow_ipc:
+        try:
+            return 'ipc', _to_ipc(df)
+        except Exception:
+            # 混合类型的 object 列无法转为 Arrow，直接 pickle DataFrame
+            pass
+    return 'frame', df
+
+
+class AttachmentParsePool:
+    """
+    多进程表格附件解析
+
+    配合 fetch_emails(..., defer_parse=True) 使用：拉取阶段只返回附件原始内容，
+    这里把附件分发到进程池解析，并按邮件的输入顺序逐封产出，下游去重看到的顺序不变。
+    同时在途的邮件数不超过 max_pending，避免积压的附件占满内存。
+    """
+
+    def __init__(self, workers=None, projections=None, arrow_ipc=True, max_pending=16):
+        """
+        参数:
+            workers: 解析进程数，默认为CPU核数
+            projections: 按分类的列投影，见 DataConfig.table_projections
+            arrow_ipc: 为True时子进程以 Arrow IPC 回传结果，无法转换时退回 pickle
+            max_pending: 同时在途（已提交、未产出）的邮件数上限
+        """
+        self.projections = projections or {}
+        self.arrow_ipc = arrow_ipc
+        self.max_pending = max_pending
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=process_context())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """关闭进程池，未开始的解析任务直接取消"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _submit(self, email_data):
+        """提交一封邮件的全部待解析附件，已解析的表格对应 None"""
+        futures = []
+        for table in email_data.tables:
+            if table.parsed or table.raw is None:
+                futures.append(None)
+                continue
+            projection = self.projections.get(table.category) or {}
+            futures.append(self._executor.submit(
+                _parse_attachment, (table.raw, table.filename, projection, self.arrow_ipc)
+            ))
+            # 原始内容已交给进程池，邮件数据不再持有
+            table.raw = None
+        return futures
+
+    def _collect(self, key, email_data, status_msg, futures):
+        """等待一封邮件的附件解析完成，写入各表格的 DataFrame"""
+        if email_data is None:
+            return key, None, status_msg
+        for table, future in zip(email_data.tables, futures):
+            if future is None:
+                continue
+            try:
+                result = future.result()
+            except Exception as e:
+                return key, None, f"【解析表格异常: {table.filename}】: {str(e)}"
+            if result is None:
+                return key, None, f"【解析表格失败: {table.filename}】"
+            kind, payload = result
+            table.attach(_from_ipc(payload) if kind == 'ipc' else payload)
+        return key, email_data, status_msg
+
+    def parse_emails(self, emails):
+        """
+        并行解析邮件附件，按输入顺序逐封产出
+
+        参数:
+            emails: (key, email_data, status_msg) 的可迭代对象，通常为 fetch_emails(..., defer_parse=True)
+
+        返回:
+            generator: (key, email_data, status_msg)，附件解析失败时 email_data 为None
+        """
+        pending = deque()
+        for key, email_data, status_msg in emails:
+            futures = self._submit(email_data) if email_data else []
+            pending.append((key, email_data, status_msg, futures))
+            # 队首已解析完成的邮件立即产出，在途邮件过多时阻塞等待队首
+            while pending and (len(pending) > self.max_pending
+                               or all(f is None or f.done() for f in pending[0][3])):
+                yield self._collect(*pending.popleft())
+        while pending:
+            yield self._collect(*pending.popleft())
@@ -0,0 +1,150 @@
+import logging
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+# 队列结束标记
+_DONE = object()
+
+
+class Stage:
+    """
+    流水线中的一个阶段
+
+    普通阶段对每个元素调用 func(item) 并把返回值交给下一阶段，workers 大于1时并行处理、按输入顺序输出；
+    stream=True 的阶段接收整个输入迭代器，func(iterable) 返回输出迭代器（如进程池解析）。
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=4, stream=False):
+        """
+        参数:
+            name: 阶段名称，用于日志
+            func: 处理函数
+            workers: 并行线程数（stream 阶段忽略）
+            queue_size: 本阶段输入队列的容量，队列满时上游阻塞（背压）
+            stream: 为True时 func 接收迭代器并返回迭代器
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.stream = stream
+
+
+class StagedPipeline:
+    """
+    由有界队列连接的多阶段流水线
+
+    每个阶段运行在自己的线程中，上一封邮件还在去重、上传时，下一封已经在拉取和解析；
+    队列满时上游阻塞，在途数据量不超过各队列容量之和。任一阶段抛出异常时整条流水线停止，
+    异常在 run() 的调用方重新抛出。
+    """
+
+    def __init__(self, stages):
+        """
+        参数:
+            stages: Stage 列表，按执行顺序排列
+        """
+        self.stages = list(stages)
+        self._stop = threading.Event()
+        self._error = None
+
+    def _put(self, q, item):
+        """放入队列，队列满时阻塞，流水线停止时放弃"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _iter_queue(self, q):
+        """逐个取出队列中的元素，直到结束标记或流水线停止"""
+        while not self._stop.is_set():
+            try:
+                item = q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                return
+            yield item
+
+    def _fail(self, name, error):
+        if self._error is None:
+            self._error = error
+            logger.error(f"【流水线阶段 {name} 异常】: {str(error)}")
+        self._stop.set()
+
+    def _run_source(self, source, output):
+        try:
+            for item in source:
+                if not self._put(output, item):
+                    return
+            self._put(output, _DONE)
+        except BaseException as e:
+            self._fail('source', e)
+
+    def _run_stage(self, stage, input_queue, output):
+        try:
+            if stage.stream:
+                for result in stage.func(self._iter_queue(input_queue)):
+                    if not self._put(output, result):
+                        return
+            elif stage.workers == 1:
+                for item in self._iter_queue(input_queue):
+                    if not self._put(output, stage.func(item)):
+                        return
+            else:
+                # 最多 workers 个元素在途，按输入顺序输出
+                with ThreadPoolExecutor(max_workers=stage.workers,
+                                        thread_name_prefix=f'pipeline-{stage.name}') as executor:
+                    pending = deque()
+                    for item in self._iter_queue(input_queue):
+                        pending.append(executor.submit(stage.func, item))
+                        while pending and (len(pending) >= stage.workers or pending[0].done()):
+                            if not self._put(output, pending.popleft().result()):
+                                return
+                    while pending:
+                        if not self._put(output, pending.popleft().result()):
+                            return
+            if not self._stop.is_set():
+                self._put(output, _DONE)
+        except BaseException as e:
+            self._fail(stage.name, e)
+
+    def run(self, source, output_size=4):
+        """
+        运行流水线，按输入顺序逐个产出最后一个阶段的结果
+
+        参数:
+            source: 输入元素的可迭代对象，在独立线程中迭代
+            output_size: 最后一个阶段输出队列的容量
+
+        返回:
+            generator: 最后一个阶段的输出
+        """
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        queues.append(queue.Queue(maxsize=output_size))
+
+        threads = [threading.Thread(target=self._run_source, args=(source, queues[0]),
+                                    name='pipeline-source', daemon=True)]
+        for stage, input_queue, output in zip(self.stages, queues, queues[1:]):
+            threads.append(threading.Thread(target=self._run_stage, args=(stage, input_queue, output),
+                                            name=f'pipeline-{stage.name}', daemon=True))
+        for thread in threads:
+            thread.start()
+
+        try:
+            yield from self._iter_queue(queues[-1])
+        finally:
+            # 调用方提前结束或出现异常时通知各阶段退出
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
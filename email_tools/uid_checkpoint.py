@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+import threading
+
+from .emailUtils import mailbox_status, search_mail_uids, search_mail_uids_since
+
+logger = logging.getLogger(__name__)
+
+
+# 默认检查点文件位置：项目根目录下的 cache 目录
+DEFAULT_CHECKPOINT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'imap_checkpoint.json'
+)
+
+
+class UIDCheckpoint:
+    """
+    按邮箱持久化的 (UIDVALIDITY, last_uid, HIGHESTMODSEQ) 检查点
+
+    每次只搜索 UID 大于 last_uid 的新邮件，不再依赖 UNSEEN，也不修改 \\Seen 标记。
+    UIDVALIDITY 变化（或首次运行）时退回到搜索未读邮件一次。
+    """
+
+    def __init__(self, key, path=DEFAULT_CHECKPOINT_PATH):
+        """
+        参数:
+            key: 检查点键，通常为 '邮箱地址/INBOX'
+            path: JSON 文件路径
+        """
+        self.key = key
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = self._load().get(key, {})
+        # 本轮搜索时的邮箱状态，全部处理完后用于推进水位
+        self._mailbox = None
+        # 处理失败的UID，水位不会越过其中最小的一个
+        self._failed_uids = set()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"【读取检查点失败，忽略】: {str(e)}")
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        data = self._load()
+        data[self.key] = self._state
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    @property
+    def last_uid(self):
+        return self._state.get('last_uid', 0)
+
+    def search_new_uids(self, mail, from_address, mailbox='INBOX'):
+        """
+        搜索检查点之后到达的指定发件人邮件
+
+        参数:
+            mail: 已选中邮箱的 imaplib.IMAP4_SSL 对象
+            from_address: 发件人地址
+
+        返回:
+            list: 新邮件的UID列表（bytes，升序）
+        """
+        status = mailbox_status(mail, mailbox)
+        self._mailbox = status
+
+        if self._state.get('uidvalidity') != status['uidvalidity']:
+            if self._state:
+                logger.warning("【UIDVALIDITY 已变化，检查点失效，重新按未读邮件搜索】")
+            else:
+                logger.info("【首次运行，按未读邮件搜索】")
+            self._state = {'uidvalidity': status['uidvalidity'], 'last_uid': 0, 'highestmodseq': None}
+            search_status, messages = search_mail_uids(mail, from_address)
+            uids = messages[0].split() if search_status == 'OK' and messages and messages[0] else []
+            return sorted(uids, key=int)
+
+        if status['uidnext'] is not None and status['uidnext'] <= self.last_uid + 1:
+            logger.info("【检查点之后没有新邮件】")
+            return []
+
+        # HIGHESTMODSEQ 只作为检查点的一致性校验，不参与搜索
+        stored_modseq = self._state.get('highestmodseq')
+        if stored_modseq and status['highestmodseq'] and status['highestmodseq'] < stored_modseq:
+            logger.warning(f"【HIGHESTMODSEQ 从 {stored_modseq} 回退到 {status['highestmodseq']}，"
+                           f"服务器可能重建了邮箱，仍按UID水位搜索】")
+
+        search_status, uids = search_mail_uids_since(mail, from_address, self.last_uid)
+        if search_status != 'OK':
+            logger.error("【增量搜索失败】")
+            return []
+        return sorted(uids, key=int)
+
+    def advance(self, uid):
+        """某封邮件处理完成后推进水位；更早的邮件失败时不越过它，下次从失败处重试"""
+        with self._lock:
+            uid = int(uid)
+            self._failed_uids.discard(uid)
+            if any(failed < uid for failed in self._failed_uids):
+                return
+            self._state['last_uid'] = max(self.last_uid, uid)
+            self._save()
+
+    def mark_failed(self, uid):
+        """记录某封邮件处理失败，水位停留在它之前"""
+        with self._lock:
+            logger.warning(f"【邮件 {uid} 处理失败，检查点停留在 UID {self.last_uid}】")
+            self._failed_uids.add(int(uid))
+
+    def complete(self):
+        """本轮邮件全部处理成功后，将水位推进到搜索时的 UIDNEXT-1 并记录 HIGHESTMODSEQ"""
+        with self._lock:
+            if self._failed_uids or self._mailbox is None:
+                return
+            if self._mailbox['uidnext']:
+                self._state['last_uid'] = max(self.last_uid, self._mailbox['uidnext'] - 1)
+            self._state['highestmodseq'] = self._mailbox['highestmodseq']
+            self._save()
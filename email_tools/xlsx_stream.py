@@ -0,0 +1,358 @@
+import io
+import posixpath
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+import pandas as pd
+
+# OOXML 命名空间
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+_ROW = f'{{{MAIN_NS}}}row'
+_CELL = f'{{{MAIN_NS}}}c'
+_VALUE = f'{{{MAIN_NS}}}v'
+_FORMULA = f'{{{MAIN_NS}}}f'
+_INLINE = f'{{{MAIN_NS}}}is'
+_TEXT = f'{{{MAIN_NS}}}t'
+_RUN = f'{{{MAIN_NS}}}r'
+_SI = f'{{{MAIN_NS}}}si'
+_HYPERLINK = f'{{{MAIN_NS}}}hyperlink'
+_MERGE_CELL = f'{{{MAIN_NS}}}mergeCell'
+_RID = f'{{{REL_NS}}}id'
+
+
+def _read_rels(archive, part):
+    """读取某个部件的关系文件，返回 {Id: (Type, Target)}"""
+    folder, name = posixpath.split(part)
+    rels_path = posixpath.join(folder, '_rels', name + '.rels')
+    if rels_path not in archive.namelist():
+        return {}
+    rels = {}
+    for _, element in iterparse(archive.open(rels_path)):
+        if element.tag == f'{{{PKG_REL_NS}}}Relationship':
+            rels[element.get('Id')] = (element.get('Type', ''), element.get('Target', ''))
+    return rels
+
+
+def _resolve(base_part, target):
+    """将关系中的 Target 解析为压缩包内的路径"""
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_part), target))
+
+
+def _text_content(element):
+    """<si>/<is> 的文本：直接的 <t>，或各个 <r> 中 <t> 的拼接（忽略注音 rPh）"""
+    plain = element.find(_TEXT)
+    snippets = [plain.text or ''] if plain is not None else []
+    for run in element.findall(_RUN):
+        text = run.find(_TEXT)
+        if text is not None:
+            snippets.append(text.text or '')
+    return ''.join(snippets)
+
+
+def _read_shared_strings(archive, path):
+    if not path or path not in archive.namelist():
+        return []
+    strings = []
+    for _, element in iterparse(archive.open(path)):
+        if element.tag == _SI:
+            strings.append(_text_content(element).replace('x005F_', ''))
+            element.clear()
+    return strings
+
+
+def _read_date_styles(archive, path):
+    """返回 (日期样式序号集合, 时长样式序号集合)，与 openpyxl 的判断规则一致"""
+    from openpyxl.styles.numbers import builtin_format_code, is_date_format, is_timedelta_format
+
+    if not path or path not in archive.namelist():
+        return set(), set()
+    custom = {}
+    date_styles, timedelta_styles = set(), set()
+    in_cell_xfs = False
+    index = 0
+    for event, element in iterparse(archive.open(path), events=('start', 'end')):
+        tag = element.tag
+        if event == 'start':
+            if tag == f'{{{MAIN_NS}}}cellXfs':
+                in_cell_xfs = True
+            continue
+        if tag == f'{{{MAIN_NS}}}numFmt':
+            custom[int(element.get('numFmtId'))] = element.get('formatCode')
+        elif tag == f'{{{MAIN_NS}}}xf' and in_cell_xfs:
+            fmt_id = int(element.get('numFmtId', 0))
+            fmt = custom[fmt_id] if fmt_id in custom else builtin_format_code(fmt_id)
+            if is_date_format(fmt):
+                date_styles.add(index)
+            if is_timedelta_format(fmt):
+                timedelta_styles.add(index)
+            index += 1
+        elif tag == f'{{{MAIN_NS}}}cellXfs':
+            in_cell_xfs = False
+    return date_styles, timedelta_styles
+
+
+def _cast_number(value):
+    if '.' in value or 'E' in value or 'e' in value:
+        return float(value)
+    return int(value)
+
+
+class _SheetReader:
+    """逐行解析工作表 XML，只保留表头行及之后的单元格值"""
+
+    def __init__(self, shared_strings, date_styles, timedelta_styles, epoch, min_row, wanted_headers=None):
+        from openpyxl.utils.cell import coordinate_to_tuple
+        from openpyxl.utils.datetime import from_excel, from_ISO8601
+
+        self.shared_strings = shared_strings
+        self.date_styles = date_styles
+        self.timedelta_styles = timedelta_styles
+        self.epoch = epoch
+        self.min_row = min_row
+        # 需要保留的表头名称，为None时保留全部列；读到表头之后的第一行时换算成列号
+        self.wanted_headers = wanted_headers
+        self.wanted_columns = None
+        self.cells = {}
+        self.max_row = 0
+        self.max_column = 0
+        self.hyperlinks = []
+        self.merged = []
+        self._shared_formulae = {}
+        self._coordinate_to_tuple = coordinate_to_tuple
+        self._from_excel = from_excel
+        self._from_iso = from_ISO8601
+
+    def _formula(self, formula, coordinate):
+        from openpyxl.formula.translate import Translator
+        from openpyxl.worksheet.formula import ArrayFormula, DataTableFormula
+
+        formula_type = formula.get('t')
+        value = '='
+        if formula.text is not None:
+            value += formula.text
+        if formula_type == 'array':
+            value = ArrayFormula(ref=formula.get('ref'), text=value)
+        elif formula_type == 'shared':
+            idx = formula.get('si')
+            if idx in self._shared_formulae:
+                value = self._shared_formulae[idx].translate_formula(coordinate)
+            elif value != '=':
+                self._shared_formulae[idx] = Translator(value, coordinate)
+        elif formula_type == 'dataTable':
+            value = DataTableFormula(**formula.attrib)
+        return value
+
+    def _cell_value(self, element, coordinate):
+        data_type = element.get('t', 'n')
+        formula = element.find(_FORMULA)
+        if formula is not None:
+            return self._formula(formula, coordinate)
+        if data_type == 'inlineStr':
+            child = element.find(_INLINE)
+            return _text_content(child) if child is not None else None
+        value = element.findtext(_VALUE, None) or None
+        if value is None:
+            return None
+        if data_type == 'n':
+            value = _cast_number(value)
+            style_id = int(element.get('s', 0))
+            if style_id in self.date_styles:
+                try:
+                    value = self._from_excel(value, self.epoch, timedelta=style_id in self.timedelta_styles)
+                except (OverflowError, ValueError):
+                    value = '#VALUE!'
+            return value
+        if data_type == 's':
+            return self.shared_strings[int(value)]
+        if data_type == 'b':
+            return bool(int(value))
+        if data_type == 'd':
+            return self._from_iso(value)
+        return value
+
+    def _is_wanted(self, column):
+        if self.wanted_headers is None:
+            return True
+        if self.wanted_columns is None:
+            self.wanted_columns = {
+                col for (row, col), value in self.cells.items()
+                if row == self.min_row and value in self.wanted_headers
+            }
+        return column in self.wanted_columns
+
+    def track(self, row, column):
+        """扩展工作表的最大行列（openpyxl 中被引用到的单元格都会被创建）"""
+        if row > self.max_row:
+            self.max_row = row
+        if column > self.max_column:
+            self.max_column = column
+
+    def parse(self, stream):
+        row_counter = 0
+        col_counter = 0
+        for event, element in iterparse(stream, events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                if tag == _ROW:
+                    r = element.get('r')
+                    row_counter = int(float(r)) if r else row_counter + 1
+                    col_counter = 0
+                continue
+            if tag == _CELL:
+                coordinate = element.get('r')
+                if coordinate:
+                    row, column = self._coordinate_to_tuple(coordinate)
+                    col_counter = column
+                else:
+                    col_counter += 1
+                    row, column = row_counter, col_counter
+                self.track(row, column)
+                if row > self.min_row and not self._is_wanted(column):
+                    # 不需要的列不解码，只登记共享公式的主单元格供同组其他单元格使用
+                    formula = element.find(_FORMULA)
+                    if formula is not None and formula.get('t') == 'shared' and formula.text:
+                        self._formula(formula, coordinate)
+                    element.clear()
+                    continue
+                # 表头之前的行也要解析，共享公式的主单元格可能在其中
+                value = self._cell_value(element, coordinate)
+                if value is not None and row >= self.min_row:
+                    self.cells[(row, column)] = value
+                element.clear()
+            elif tag == _ROW:
+                element.clear()
+            elif tag == _HYPERLINK:
+                self.hyperlinks.append((element.get('ref'), element.get(_RID)))
+            elif tag == _MERGE_CELL:
+                self.merged.append(element.get('ref'))
+
+
+def read_sheet_with_hyperlinks(content, sheet_name, header_row=2, link_column='文章链接地址',
+                               columns=None, renames=None):
+    """
+    流式读取 xlsx 中的指定工作表，结果与 openpyxl 完整模式加载后逐格读取一致
+
+    只解析工作簿目录、共享字符串、样式中的数字格式、目标工作表及其关系文件，
+    不为每个单元格创建对象；link_column 列的值替换为单元格超链接的目标地址。
+
+    参数:
+        content: xlsx 文件内容（bytes）
+        sheet_name: 工作表名称
+        header_row: 表头所在行号（从1开始），数据从下一行开始
+        link_column: 需要替换为超链接地址的列名
+        columns: 列投影，只解码这些列（按重命名后的名称），缺失的列填充为空字符串；为None时保留全部列
+        renames: 表头重命名映射，如 {'作者名': '公众号名称'}
+
+    返回:
+        pd.DataFrame: 解析后的数据
+
+    异常:
+        KeyError: 工作簿中没有该工作表
+    """
+    from openpyxl.utils.cell import range_boundaries
+    from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900
+
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        # 定位工作簿部件
+        workbook_part = 'xl/workbook.xml'
+        for rel_type, target in _read_rels(archive, '').values():
+            if rel_type.endswith('/officeDocument'):
+                workbook_part = _resolve('', target)
+        workbook_rels = _read_rels(archive, workbook_part)
+
+        sheet_rid = None
+        epoch = CALENDAR_WINDOWS_1900
+        for _, element in iterparse(archive.open(workbook_part)):
+            if element.tag == f'{{{MAIN_NS}}}sheet' and element.get('name') == sheet_name:
+                sheet_rid = element.get(_RID)
+            elif element.tag == f'{{{MAIN_NS}}}workbookPr':
+                if element.get('date1904') in ('1', 'true'):
+                    epoch = CALENDAR_MAC_1904
+        if sheet_rid is None or sheet_rid not in workbook_rels:
+            raise KeyError(sheet_name)
+        sheet_part = _resolve(workbook_part, workbook_rels[sheet_rid][1])
+
+        shared_strings_part = styles_part = None
+        for rel_type, target in workbook_rels.values():
+            if rel_type.endswith('/sharedStrings'):
+                shared_strings_part = _resolve(workbook_part, target)
+            elif rel_type.endswith('/styles'):
+                styles_part = _resolve(workbook_part, target)
+
+        renames = renames or {}
+        wanted_headers = None
+        if columns is not None:
+            wanted = set(columns)
+            wanted_headers = wanted | {source for source, target in renames.items() if target in wanted}
+
+        date_styles, timedelta_styles = _read_date_styles(archive, styles_part)
+        reader = _SheetReader(
+            _read_shared_strings(archive, shared_strings_part),
+            date_styles, timedelta_styles, epoch, header_row, wanted_headers,
+        )
+        with archive.open(sheet_part) as stream:
+            reader.parse(stream)
+        sheet_rels = _read_rels(archive, sheet_part)
+
+    # 合并单元格：区域内单元格都存在，除左上角外的值为空
+    merged_anchor = {}
+    for ref in reader.merged:
+        min_col, min_row, max_col, max_row = range_boundaries(ref)
+        reader.track(max_row, max_col)
+        for row in range(min_row, max_row + 1):
+            for column in range(min_col, max_col + 1):
+                if (row, column) != (min_row, min_col):
+                    merged_anchor[(row, column)] = (min_row, min_col)
+                    reader.cells.pop((row, column), None)
+
+    # 超链接：区域链接作用于区域内每个非合并单元格，合并单元格上的链接归到左上角
+    links = {}
+    for ref, rid in reader.hyperlinks:
+        target = sheet_rels[rid][1] if rid and rid in sheet_rels else None
+        min_col, min_row, max_col, max_row = range_boundaries(ref)
+        reader.track(max_row, max_col)
+        if ':' in ref:
+            for row in range(min_row, max_row + 1):
+                for column in range(min_col, max_col + 1):
+                    if (row, column) not in merged_anchor:
+                        links[(row, column)] = target
+        else:
+            links[merged_anchor.get((min_row, min_col), (min_row, min_col))] = target
+
+    # 与 openpyxl 一致：工作表为空时最大行列为1，读取表头行会把行数扩展到表头行
+    max_column = reader.max_column or 1
+    max_row = max(reader.max_row, header_row)
+    cells = reader.cells
+    headers = [cells.get((header_row, column)) for column in range(1, max_column + 1)]
+    link_column_number = headers.index(link_column) + 1 if link_column in headers else None
+
+    if columns is not None:
+        # 每个目标列取第一个（重命名后）同名的源列
+        sources = {}
+        for column, header in enumerate(headers, start=1):
+            sources.setdefault(renames.get(header, header), column)
+        selected = [(name, sources[name]) for name in dict.fromkeys(columns) if name in sources]
+        data = {}
+        for name, column in selected:
+            values = [cells.get((row, column)) for row in range(header_row + 1, max_row + 1)]
+            if column == link_column_number:
+                for offset, row in enumerate(range(header_row + 1, max_row + 1)):
+                    if (row, column) in links:
+                        values[offset] = links[(row, column)]
+            data[name] = values
+        frame = pd.DataFrame(data, columns=[name for name, _ in selected])
+        # 缺失的目标列一次性补齐
+        return frame.reindex(columns=list(columns), fill_value='')
+
+    data = []
+    for row in range(header_row + 1, max_row + 1):
+        row_data = [cells.get((row, column)) for column in range(1, max_column + 1)]
+        if link_column_number is not None and (row, link_column_number) in links:
+            row_data[link_column_number - 1] = links[(row, link_column_number)]
+        data.append(row_data)
+    return pd.DataFrame(data, columns=headers)
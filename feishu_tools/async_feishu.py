@@ -0,0 +1,266 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import httpx
+from lark_oapi.api.bitable.v1 import AppTableRecord
+
+from feishu_tools.record_mirror import FeishuRecordMirror
+from feishu_tools.request_scheduler import RequestScheduler, shared_scheduler
+from feishu_tools.save_data_to_feishu import (
+    FeishuDataSaver, FeishuFields, build_webhook_payload, feishu_config,
+)
+
+logger = logging.getLogger(__name__)
+
+
+FEISHU_OPEN_API = "https://open.feishu.cn/open-apis"
+
+# tenant_access_token 无效或已过期，清除缓存后重新获取
+INVALID_TOKEN_CODES = {99991663, 99991668}
+
+
+class AsyncFeishuDataSaver:
+    """
+    FeishuDataSaver 的异步版本
+
+    基于带连接池和 keep-alive 的 httpx.AsyncClient，save_data / get_existing_records /
+    save_duplicate_record(s) / send_feishu_webhook_notification 均为协程，
+    可与邮件拉取、解析等其他 I/O 在同一事件循环中并发执行。
+    返回值与同步版本保持一致。
+    """
+
+    def __init__(self, max_connections: int = 10, timeout: float = 30.0,
+                 scheduler: Optional[RequestScheduler] = None, mirror: Optional[FeishuRecordMirror] = None):
+        """
+        Args:
+            max_connections: 连接池最大连接数
+            timeout: 单次请求超时秒数
+            scheduler: 请求调度器，默认与同步保存器共用
+            mirror: 已有记录的本地镜像，新建的记录写入镜像供后续去重使用
+        """
+        self.scheduler = scheduler or shared_scheduler
+        self.mirror = mirror
+        self.client = httpx.AsyncClient(
+            base_url=FEISHU_OPEN_API,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+        self._token: Optional[str] = None
+        self._token_expire_at = 0.0
+        self._token_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> 'AsyncFeishuDataSaver':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """关闭连接池"""
+        await self.client.aclose()
+
+    async def _get_tenant_access_token(self) -> str:
+        """获取并缓存 tenant_access_token，过期前一分钟刷新；被接口判定无效时由 _request 清除缓存"""
+        async with self._token_lock:
+            if self._token and time.monotonic() < self._token_expire_at:
+                return self._token
+            response = await self.client.post(
+                "/auth/v3/tenant_access_token/internal",
+                json={"app_id": feishu_config.APP_ID, "app_secret": feishu_config.APP_SECRET},
+            )
+            response.raise_for_status()
+            data = response.json()
+            if data.get("code") != 0:
+                raise RuntimeError(f"获取tenant_access_token失败, code: {data.get('code')}, msg: {data.get('msg')}")
+            self._token = data["tenant_access_token"]
+            self._token_expire_at = time.monotonic() + data.get("expire", 7200) - 60
+            return self._token
+
+    async def _request(self, table_id: str, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        """
+        经调度器限流发起开放平台请求，频率限制时自动退避重试
+
+        Returns:
+            Dict[str, Any]: 响应中的 data 字段
+
+        Raises:
+            RuntimeError: 返回码非0时抛出
+        """
+        async def send():
+            token = await self._get_tenant_access_token()
+            return await self.client.request(
+                method, path, headers={"Authorization": f"Bearer {token}"}, **kwargs
+            )
+
+        for attempt in range(2):
+            response = await self.scheduler.acall((feishu_config.APP_ID, table_id), send)
+            try:
+                body = response.json()
+            except ValueError:
+                response.raise_for_status()
+                raise
+            if body.get("code") in INVALID_TOKEN_CODES and attempt == 0:
+                # token 在缓存到期前被接口判定无效（如应用密钥重置），清除缓存后重试一次
+                logger.warning(f"tenant_access_token 无效 (code: {body.get('code')})，重新获取后重试")
+                async with self._token_lock:
+                    self._token = None
+                continue
+            break
+        if body.get("code") != 0:
+            raise RuntimeError(f"code: {body.get('code')}, msg: {body.get('msg')}")
+        return body.get("data") or {}
+
+    @staticmethod
+    def _records_path(table_id: str) -> str:
+        return f"/bitable/v1/apps/{feishu_config.APP_TOKEN}/tables/{table_id}/records"
+
+    async def _batch_create(self, table_id: str, chunk: List[Dict[str, Any]]) -> List[AppTableRecord]:
+        data = await self._request(
+            table_id,
+            "POST",
+            f"{self._records_path(table_id)}/batch_create",
+            # client_token 使网络异常时的重试幂等
+            params={"client_token": str(uuid.uuid4())},
+            json={"records": [{"fields": item} for item in chunk]},
+        )
+        created_records = [AppTableRecord(record) for record in data.get("records") or []]
+        # 与同步版本一致，新建记录写入本地镜像；镜像写入失败不影响已创建的记录
+        if self.mirror is not None and table_id != feishu_config.DUPLICATED_TABLE_ID:
+            try:
+                self.mirror.upsert_records(table_id, filter(None, map(FeishuDataSaver._project_record, created_records)))
+            except Exception as e:
+                logger.error(f"❌ 新建记录写入本地镜像失败: {str(e)}")
+        return created_records
+
+    async def save_data(self, news_data: List[Dict[str, Any]], data_type: int = 1) -> Optional[List[AppTableRecord]]:
+        """
+        保存数据到飞书多维表格
+
+        Args:
+            news_data: 要保存的数据列表
+            data_type: 数据类型 (0: 境内数据, 1: 境外数据, 默认为境外数据)
+
+        Returns:
+            Optional[List[AppTableRecord]]: 创建的记录列表，任一批次失败时返回None
+        """
+        if not news_data:
+            logger.warning("没有要保存的数据")
+            return None
+
+        table_id = feishu_config.GN_TABLE_ID if data_type == 0 else feishu_config.GW_TABLE_ID
+        semaphore = asyncio.Semaphore(feishu_config.UPLOAD_WORKERS)
+
+        async def save_chunk(chunk):
+            async with semaphore:
+                try:
+                    return await self._batch_create(table_id, chunk)
+                except Exception as e:
+                    logger.error(f"❌ 批量保存失败, {str(e)}")
+                    return None
+
+        results = await asyncio.gather(*(save_chunk(chunk) for chunk in FeishuDataSaver._chunk_data(news_data)))
+        if any(result is None for result in results):
+            return None
+
+        created_records = [record for result in results for record in result]
+        logger.info(f"✅ 批量保存成功! 共处理 {len(news_data)} 条记录，成功创建 {len(created_records)} 条记录")
+        return created_records
+
+    async def get_existing_records(self, data_type: int, page_size: int = 500) -> List[Dict[str, Any]]:
+        """
+        获取飞书表格中已有的记录，处理当前页时预取下一页
+
+        Args:
+            data_type: 数据类型 (0: 境内数据, 1: 境外数据)
+            page_size: 每页记录数
+
+        Returns:
+            List[Dict[str, Any]]: 包含 record_id/title/url 的记录列表，失败时返回空列表
+        """
+        table_id = feishu_config.GN_TABLE_ID if data_type == 0 else feishu_config.GW_TABLE_ID
+        field_names = json.dumps([FeishuFields.NEWS_TITLE, FeishuFields.NEWS_SOURCE], ensure_ascii=False)
+
+        def fetch_page(page_token):
+            params = {"page_size": page_size, "field_names": field_names}
+            if page_token:
+                params["page_token"] = page_token
+            return asyncio.ensure_future(self._request(table_id, "GET", self._records_path(table_id), params=params))
+
+        existing_records = []
+        pending = None
+        try:
+            pending = fetch_page(None)
+            while pending is not None:
+                data = await pending
+                pending = fetch_page(data["page_token"]) if data.get("has_more") and data.get("page_token") else None
+                for item in data.get("items") or []:
+                    projected = FeishuDataSaver._project_record(AppTableRecord(item))
+                    if projected:
+                        existing_records.append(projected)
+        except Exception as e:
+            if pending is not None:
+                pending.cancel()
+            logger.error(f"❌ 获取飞书表格已有记录失败, {str(e)}")
+            return []
+
+        logger.info(f"✅ 获取飞书表格已有记录成功! 共 {len(existing_records)} 条记录")
+        return existing_records
+
+    async def save_duplicate_record(self, duplicate_info: Dict[str, Any]) -> bool:
+        """
+        保存重复记录到DUPLICATED_TABLE_ID表格
+
+        Args:
+            duplicate_info: 重复记录信息，包含 "重复记录" 字段
+
+        Returns:
+            bool: 保存成功返回True，失败返回False
+        """
+        return await self.save_duplicate_records([duplicate_info])
+
+    async def save_duplicate_records(self, duplicate_infos: List[Dict[str, Any]]) -> bool:
+        """
+        批量保存重复记录到DUPLICATED_TABLE_ID表格
+
+        Args:
+            duplicate_infos: 重复记录信息列表，超过单批上限时自动分批
+
+        Returns:
+            bool: 全部保存成功返回True，否则返回False
+        """
+        success = True
+        for chunk in FeishuDataSaver._chunk_data(duplicate_infos):
+            try:
+                await self._batch_create(feishu_config.DUPLICATED_TABLE_ID, chunk)
+                logger.info(f"✅ 保存重复记录成功! 共 {len(chunk)} 条")
+            except Exception as e:
+                logger.error(f"❌ 保存重复记录失败, {str(e)}")
+                success = False
+        return success
+
+    async def send_feishu_webhook_notification(self, total_updated: int, gn_updated: int, gw_updated: int, reviewer: str) -> bool:
+        """
+        发送飞书webhook通知
+
+        Args:
+            total_updated: 更新的记录总数
+            gn_updated: 境内更新记录数
+            gw_updated: 境外更新记录数
+            reviewer: 审核人姓名
+
+        Returns:
+            bool: 发送成功返回True，失败返回False
+        """
+        try:
+            payload = build_webhook_payload(total_updated, gn_updated, gw_updated, reviewer)
+            response = await self.client.post(feishu_config.WEBHOOK_URL, json=payload)
+            response.raise_for_status()
+            logger.info(f"飞书webhook发送成功: {response.json()}")
+            return True
+        except Exception as e:
+            logger.error(f"飞书webhook发送失败: {str(e)}")
+            return False
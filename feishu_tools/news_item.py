@@ -0,0 +1,86 @@
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from feishu_tools.save_data_to_feishu import FeishuFields
+
+# 驻留的飞书字段名，所有记录的 fields 字典共享同一组键对象
+TITLE_KEY = sys.intern(FeishuFields.NEWS_TITLE)
+CONTENT_KEY = sys.intern(FeishuFields.NEWS_CONTENT)
+SOURCE_KEY = sys.intern(FeishuFields.NEWS_SOURCE)
+CATEGORY_KEY = sys.intern(FeishuFields.NEWS_CATEGORY)
+REVIEWER_KEY = sys.intern(FeishuFields.REVIEWER_TEXT)
+
+
+@dataclass(slots=True, eq=False)
+class NewsItem:
+    """
+    流经去重和上传的一条新闻
+
+    正文不复制到每条记录中，而是保留源 DataFrame 正文列的数组（content_source）和行号，
+    读取 content 或序列化时才取值；to_fields() 在上传、写入重复记录时才生成飞书字段字典。
+    仍支持 item['title']、item.get('similarity') 等原 dict 形式的读写。
+    """
+
+    title: Any
+    category: int
+    source_text: str
+    source_link: str
+    content_source: Any = None
+    row: int = 0
+    attachment: Optional[str] = None
+    news_category: str = '动态'
+    reviewer: str = ''
+    similarity: Optional[float] = None
+    duplicate_title: Optional[str] = None
+
+    @property
+    def content(self) -> Any:
+        """正文，缺失值（NaN、pd.NA）为空字符串"""
+        if self.content_source is None:
+            return ''
+        value = self.content_source[self.row]
+        # value != value 判断 NaN
+        return '' if value is None or value is pd.NA or value != value else value
+
+    def to_fields(self) -> Dict[str, Any]:
+        """
+        生成飞书记录的 fields 字典
+
+        Returns:
+            Dict[str, Any]: 原文标题、动态原文、动态来源、内容类型、审核人文本
+        """
+        return {
+            TITLE_KEY: self.title,
+            CONTENT_KEY: self.content,
+            SOURCE_KEY: {"text": self.source_text, "link": self.source_link},
+            CATEGORY_KEY: self.news_category,
+            REVIEWER_KEY: self.reviewer
+        }
+
+    # 兼容原来以 dict 形式传递的条目
+    _KEYS = frozenset(('title', 'category', 'attachment', 'record', 'similarity', 'duplicate_title'))
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'record':
+            return self.to_fields()
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self._KEYS or key == 'record':
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        if key in ('similarity', 'duplicate_title'):
+            return getattr(self, key) is not None
+        return key in self._KEYS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            return default
+        return self[key]
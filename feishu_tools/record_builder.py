@@ -0,0 +1,158 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from feishu_tools.news_item import NewsItem
+from feishu_tools.save_data_to_feishu import FeishuFields
+
+logger = logging.getLogger(__name__)
+
+
+# 固定审核人
+DEFAULT_REVIEWER = "尹晓丹"
+# 网站名称为空时动态来源显示的文本
+UNKNOWN_SOURCE = "未知来源"
+
+
+def column_values(df: pd.DataFrame, column: str) -> pd.Series:
+    """
+    取出一列并转为 object 类型，缺失列或缺失值（NaN、Arrow 列的 pd.NA）统一为空字符串
+
+    Args:
+        df: 表格数据
+        column: 列名，存在同名列时取第一个
+
+    Returns:
+        pd.Series: 与 df 行数相同的 object 列
+    """
+    if column not in df.columns:
+        return pd.Series([''] * len(df), index=df.index, dtype=object)
+    series = df[column]
+    if isinstance(series, pd.DataFrame):
+        series = series.iloc[:, 0]
+    return series.astype(object).where(series.notna(), '')
+
+
+def column_array(df: pd.DataFrame, column: str) -> Optional[Any]:
+    """
+    取出列的底层数组（不复制），供 NewsItem 按行号延迟读取；列不存在时返回None
+
+    Args:
+        df: 表格数据
+        column: 列名，存在同名列时取第一个
+    """
+    if column not in df.columns:
+        return None
+    series = df[column]
+    if isinstance(series, pd.DataFrame):
+        series = series.iloc[:, 0]
+    # Arrow 列保留 ArrowExtensionArray，numpy 列直接取 ndarray（均不复制）
+    return series.array if isinstance(series.dtype, pd.ArrowDtype) else series.to_numpy()
+
+
+def build_news_items(df: pd.DataFrame, category: int, attachment: Optional[str] = None,
+                     reviewer: str = DEFAULT_REVIEWER, news_category: str = '动态') -> List[NewsItem]:
+    """
+    按列批量构建待写入飞书的新闻条目，替代逐行 iterrows
+
+    标题列（境内取标题，境外取标题(译文)）、动态来源的文本与链接都按整列计算，
+    最后一次遍历组装出条目列表；正文不复制，条目只引用正文列的数组和行号。
+
+    Args:
+        df: 解析后的表格数据
+        category: 数据类别 (0: 境内数据, 1: 境外数据)
+        attachment: 附件的 SHA-256，用于回写台账
+        reviewer: 审核人文本
+        news_category: 内容类型，默认为“动态”
+
+    Returns:
+        List[NewsItem]: 新闻条目，NewsItem.to_fields() 为飞书字段
+    """
+    title_field = '标题' if category == 0 else '标题(译文)'
+    titles = column_values(df, title_field).tolist()
+    contents = column_array(df, '正文')
+
+    # Link类型需要对象格式，且必须至少包含text或link中的一个
+    names = column_values(df, '网站名称')
+    urls = column_values(df, '文章链接地址')
+    link_texts = names.astype(str).where(names.astype(bool), UNKNOWN_SOURCE).tolist()
+    link_urls = urls.astype(str).where(urls.astype(bool), '').tolist()
+
+    return [
+        NewsItem(title, category, link_text, link_url, contents, row,
+                 attachment=attachment, news_category=news_category, reviewer=reviewer)
+        for row, (title, link_text, link_url) in enumerate(zip(titles, link_texts, link_urls))
+    ]
+
+
+def build_news_records(df: pd.DataFrame, category: int, reviewer: str = DEFAULT_REVIEWER) -> List[Dict[str, Any]]:
+    """只返回飞书字段字典列表，见 build_news_items"""
+    return [item.to_fields() for item in build_news_items(df, category, reviewer=reviewer)]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='对比逐行 iterrows 与按列构建飞书记录的耗时')
+    parser.add_argument('--rows', type=int, default=20000, help='测试数据行数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数，取最短耗时')
+    args = parser.parse_args()
+
+    def iterrows_items(df, category):
+        """原 process_news 中逐行构建的实现，作为对照"""
+        items = []
+        transformed_df = df.copy()
+        transformed_df['信源类型'] = '境外媒体'
+        for _, row in transformed_df.iterrows():
+            name = row.get('网站名称', '')
+            url = row.get('文章链接地址', '')
+            title = row.get('标题' if category == 0 else '标题(译文)', '')
+            items.append({
+                'title': title,
+                'category': category,
+                'attachment': None,
+                'record': {
+                    FeishuFields.NEWS_TITLE: title,
+                    FeishuFields.NEWS_CONTENT: row.get('正文', ''),
+                    FeishuFields.NEWS_SOURCE: {
+                        "text": str(name) if pd.notna(name) and name else UNKNOWN_SOURCE,
+                        "link": str(url) if pd.notna(url) and url else ""
+                    },
+                    FeishuFields.NEWS_CATEGORY: '动态',
+                    FeishuFields.REVIEWER_TEXT: DEFAULT_REVIEWER
+                }
+            })
+        return items
+
+    sample = pd.DataFrame({
+        '发布时间': ['2024-01-01 08:00:00'] * args.rows,
+        '网站名称': [f'网站{i}' if i % 7 else None for i in range(args.rows)],
+        '文章链接地址': [f'https://example.com/{i}' for i in range(args.rows)],
+        '标题': [f'标题{i}' for i in range(args.rows)],
+        '标题(译文)': [f'译文标题{i}' for i in range(args.rows)],
+        '正文': ['正文内容' * 200] * args.rows,
+    })
+
+    def best_of(func):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = func(sample, 1)
+            timings.append(time.perf_counter() - start)
+        return min(timings), result
+
+    def columnar_items(df, category):
+        """按列构建并序列化为飞书字段，与逐行实现的输出对比"""
+        return [{'title': item.title, 'category': item.category, 'attachment': item.attachment,
+                 'record': item.to_fields()} for item in build_news_items(df, category)]
+
+    loop_seconds, expected = best_of(iterrows_items)
+    column_seconds, actual = best_of(columnar_items)
+    assert actual == expected, "按列构建的结果与逐行构建不一致"
+
+    print(f"行数: {args.rows}")
+    print(f"iterrows:  {loop_seconds:.3f}s, 每行 {loop_seconds / args.rows * 1e6:.2f}µs")
+    print(f"按列构建:  {column_seconds:.3f}s, 每行 {column_seconds / args.rows * 1e6:.2f}µs")
+    print(f"加速比: {loop_seconds / column_seconds:.1f}x")
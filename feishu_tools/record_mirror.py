@@ -0,0 +1,190 @@
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# 默认镜像文件位置：项目根目录下的 cache 目录
+DEFAULT_MIRROR_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'feishu_records.sqlite3'
+)
+
+
+class FeishuRecordMirror:
+    """飞书多维表格已有记录的本地SQLite镜像"""
+
+    def __init__(self, db_path: str = DEFAULT_MIRROR_PATH):
+        """
+        Args:
+            db_path: SQLite文件路径，传入 ':memory:' 时仅在内存中保存
+        """
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                table_id TEXT NOT NULL,
+                record_id TEXT NOT NULL,
+                title TEXT,
+                url TEXT,
+                created_time INTEGER,
+                last_modified_time INTEGER,
+                PRIMARY KEY (table_id, record_id)
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                table_id TEXT PRIMARY KEY,
+                last_modified_time INTEGER,
+                synced_at REAL,
+                full_synced_at REAL
+            );
+        """)
+        # 兼容旧版本创建的镜像文件
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sync_state)")}
+        if 'full_synced_at' not in columns:
+            self._conn.execute("ALTER TABLE sync_state ADD COLUMN full_synced_at REAL")
+        self._conn.commit()
+        # 已从磁盘加载过的表格缓存 table_id -> {record_id: record}
+        self._cache: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def get_watermark(self, table_id: str) -> Optional[int]:
+        """
+        获取表格上次同步到的最后修改时间
+
+        Args:
+            table_id: 飞书表格ID
+
+        Returns:
+            Optional[int]: 毫秒时间戳，从未同步过时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_modified_time FROM sync_state WHERE table_id = ?", (table_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_last_full_sync(self, table_id: str) -> Optional[float]:
+        """
+        获取表格上次全量同步的时间
+
+        Args:
+            table_id: 飞书表格ID
+
+        Returns:
+            Optional[float]: Unix时间戳（秒），从未全量同步过时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT full_synced_at FROM sync_state WHERE table_id = ?", (table_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, table_id: str, last_modified_time: Optional[int], full: bool = False) -> None:
+        """
+        记录表格的同步水位
+
+        Args:
+            table_id: 飞书表格ID
+            last_modified_time: 同步到的最后修改时间（毫秒时间戳）
+            full: 本次是否为全量同步，为True时同时更新全量同步时间
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sync_state (table_id, last_modified_time, synced_at, full_synced_at) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (table_id) DO UPDATE SET "
+                "last_modified_time = excluded.last_modified_time, synced_at = excluded.synced_at, "
+                "full_synced_at = COALESCE(excluded.full_synced_at, sync_state.full_synced_at)",
+                (table_id, last_modified_time, now, now if full else None),
+            )
+            self._conn.commit()
+
+    def upsert_records(self, table_id: str, records: Iterable[Dict[str, Any]], replace_all: bool = False) -> int:
+        """
+        写入或更新镜像记录
+
+        Args:
+            table_id: 飞书表格ID
+            records: 记录列表，每条包含 record_id/title/url/created_time/last_modified_time
+            replace_all: 为True时先清空该表格的镜像（全量同步）
+
+        Returns:
+            int: 写入的记录数
+        """
+        rows = [
+            (table_id, r['record_id'], r.get('title'), r.get('url'),
+             r.get('created_time'), r.get('last_modified_time'))
+            for r in records
+        ]
+        with self._lock:
+            with self._conn:
+                if replace_all:
+                    self._conn.execute("DELETE FROM records WHERE table_id = ?", (table_id,))
+                self._conn.executemany(
+                    "INSERT INTO records "
+                    "(table_id, record_id, title, url, created_time, last_modified_time) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (table_id, record_id) DO UPDATE SET "
+                    "title = excluded.title, url = excluded.url, "
+                    "created_time = COALESCE(excluded.created_time, records.created_time), "
+                    "last_modified_time = COALESCE(excluded.last_modified_time, records.last_modified_time)",
+                    rows,
+                )
+            if replace_all:
+                self._cache.pop(table_id, None)
+            cached = self._cache.get(table_id)
+            if cached is not None:
+                for row in rows:
+                    record = self._row_to_record(row[1:])
+                    previous = cached.get(record['record_id'])
+                    if previous:
+                        for key in ('created_time', 'last_modified_time'):
+                            if record[key] is None:
+                                record[key] = previous[key]
+                    cached[record['record_id']] = record
+        return len(rows)
+
+    @staticmethod
+    def _row_to_record(row) -> Dict[str, Any]:
+        record_id, title, url, created_time, last_modified_time = row
+        return {
+            'record_id': record_id,
+            'title': title,
+            'url': url,
+            'created_time': created_time,
+            'last_modified_time': last_modified_time,
+        }
+
+    def load_records(self, table_id: str) -> List[Dict[str, Any]]:
+        """
+        读取镜像中的全部记录，首次读取后常驻内存
+
+        Args:
+            table_id: 飞书表格ID
+
+        Returns:
+            List[Dict[str, Any]]: 记录列表，按写入顺序排列
+        """
+        with self._lock:
+            cached = self._cache.get(table_id)
+            if cached is None:
+                rows = self._conn.execute(
+                    "SELECT record_id, title, url, created_time, last_modified_time "
+                    "FROM records WHERE table_id = ? ORDER BY rowid",
+                    (table_id,),
+                ).fetchall()
+                cached = {row[0]: self._row_to_record(row) for row in rows}
+                self._cache[table_id] = cached
+            return list(cached.values())
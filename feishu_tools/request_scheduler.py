@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# 飞书频率限制及可重试的错误码
+FREQUENCY_LIMIT_CODES = {
+    99991400,  # request trigger frequency limit（应用级频率限制）
+    1254290,   # TooManyRequest（多维表格接口频率限制）
+    1254291,   # Write conflict（同一表格并发写冲突）
+    1254607,   # Data not ready（数据尚未就绪，稍后重试）
+}
+
+
+def is_rate_limited(status_code: Optional[int], code: Optional[int]) -> bool:
+    """
+    判断响应是否为频率限制
+
+    Args:
+        status_code: HTTP状态码
+        code: 飞书返回的业务错误码
+
+    Returns:
+        bool: HTTP 429 或命中频率限制错误码时返回True
+    """
+    return status_code == 429 or code in FREQUENCY_LIMIT_CODES
+
+
+def is_server_error(status_code: Optional[int]) -> bool:
+    """HTTP 5xx 视为服务端临时故障，可以重试"""
+    return status_code is not None and status_code >= 500
+
+
+_TRANSIENT_EXCEPTIONS: Optional[Tuple[type, ...]] = None
+
+
+def transient_exceptions() -> Tuple[type, ...]:
+    """
+    可重试的网络异常：连接失败、连接被重置、超时
+
+    lark SDK 基于 requests，异步保存器基于 httpx，两者都按需导入；
+    只重试这些传输层异常，其余异常（参数错误等）直接抛出。
+    """
+    global _TRANSIENT_EXCEPTIONS
+    if _TRANSIENT_EXCEPTIONS is None:
+        exceptions = [ConnectionError, TimeoutError]
+        try:
+            import requests
+            exceptions += [requests.exceptions.ConnectionError, requests.exceptions.Timeout]
+        except ImportError:
+            pass
+        try:
+            import httpx
+            exceptions.append(httpx.TransportError)
+        except ImportError:
+            pass
+        _TRANSIENT_EXCEPTIONS = tuple(exceptions)
+    return _TRANSIENT_EXCEPTIONS
+
+
+def retry_after_seconds(headers: Optional[Dict[str, Any]]) -> Optional[float]:
+    """
+    从响应头中读取服务端建议的等待秒数
+
+    Args:
+        headers: 响应头
+
+    Returns:
+        Optional[float]: x-ogw-ratelimit-reset 或 Retry-After 的值，没有时返回None
+    """
+    if not headers:
+        return None
+    lowered = {str(key).lower(): value for key, value in dict(headers).items()}
+    for name in ('x-ogw-ratelimit-reset', 'retry-after'):
+        value = lowered.get(name)
+        if isinstance(value, (list, tuple)):
+            value = value[0] if value else None
+        try:
+            return float(value) if value is not None else None
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class TokenBucket:
+    """线程安全的令牌桶"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发请求数）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        预定一个令牌
+
+        Returns:
+            float: 需要等待的秒数，令牌充足时为0
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """阻塞直到获得一个令牌"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class RequestScheduler:
+    """
+    飞书请求调度器
+
+    按 (app_id, table_id) 维度做令牌桶限流；遇到 HTTP 429 或频率限制错误码、HTTP 5xx
+    或连接失败、超时等网络异常时按带抖动的指数退避重试，服务端给出重置时间时至少等待该时长。
+    同步调用与协程调用共享同一组令牌桶。
+    """
+
+    def __init__(self, rate: float = 10.0, burst: float = 10.0, max_retries: int = 5,
+                 base_delay: float = 0.5, max_delay: float = 30.0):
+        """
+        Args:
+            rate: 每个键每秒允许的请求数
+            burst: 每个键允许的突发请求数
+            max_retries: 频率限制、服务端错误或网络异常时的最大重试次数
+            base_delay: 退避的初始秒数
+            max_delay: 单次退避的最大秒数
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, key: Hashable) -> TokenBucket:
+        """获取键对应的令牌桶，不存在时创建"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def backoff(self, attempt: int, server_hint: Optional[float] = None) -> float:
+        """
+        计算第 attempt 次重试前的等待秒数（full jitter 指数退避）
+
+        Args:
+            attempt: 已重试次数，从0开始
+            server_hint: 服务端建议的等待秒数
+
+        Returns:
+            float: 等待秒数
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if server_hint:
+            delay = max(delay, min(server_hint, self.max_delay))
+        return delay
+
+    @staticmethod
+    def _lark_retry_info(response) -> tuple:
+        raw = getattr(response, 'raw', None)
+        status_code = getattr(raw, 'status_code', None)
+        headers = getattr(raw, 'headers', None)
+        code = getattr(response, 'code', None)
+        if is_rate_limited(status_code, code):
+            return '触发频率限制', code, retry_after_seconds(headers)
+        if is_server_error(status_code):
+            return '服务端错误', status_code, retry_after_seconds(headers)
+        return None, code, None
+
+    def call(self, key: Hashable, send: Callable[[], Any]) -> Any:
+        """
+        限流并发起 lark 请求，频率限制、服务端错误或网络异常时自动重试
+
+        Args:
+            key: 限流键，通常为 (app_id, table_id)
+            send: 发起请求并返回 lark 响应的函数
+
+        Returns:
+            Any: 最后一次请求的响应
+
+        Raises:
+            Exception: 网络异常重试次数用尽时抛出最后一次的异常
+        """
+        bucket = self.bucket(key)
+        attempt = 0
+        while True:
+            bucket.acquire()
+            try:
+                response = send()
+            except transient_exceptions() as e:
+                if attempt >= self.max_retries:
+                    logger.error(f"❌ 请求 {key} 多次网络异常，放弃重试: {str(e)}")
+                    raise
+                reason, code, hint = '网络异常', type(e).__name__, None
+            else:
+                reason, code, hint = self._lark_retry_info(response)
+                if reason is None or attempt >= self.max_retries:
+                    if reason is not None:
+                        logger.error(f"❌ 请求 {key} 多次{reason}，放弃重试")
+                    return response
+            delay = self.backoff(attempt, hint)
+            logger.warning(f"请求 {key} {reason} ({code})，{delay:.2f} 秒后第 {attempt + 1} 次重试")
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, key: Hashable, send: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        限流并发起 httpx 异步请求，频率限制、服务端错误或网络异常时自动重试
+
+        Args:
+            key: 限流键，通常为 (app_id, table_id)
+            send: 返回 httpx.Response 协程的函数
+
+        Returns:
+            Any: 最后一次请求的 httpx.Response
+
+        Raises:
+            Exception: 网络异常重试次数用尽时抛出最后一次的异常
+        """
+        bucket = self.bucket(key)
+        attempt = 0
+        while True:
+            wait = bucket.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                response = await send()
+            except transient_exceptions() as e:
+                if attempt >= self.max_retries:
+                    logger.error(f"❌ 请求 {key} 多次网络异常，放弃重试: {str(e)}")
+                    raise
+                reason, code, hint = '网络异常', type(e).__name__, None
+            else:
+                try:
+                    code = response.json().get('code')
+                except ValueError:
+                    code = None
+                if is_rate_limited(response.status_code, code):
+                    reason = '触发频率限制'
+                elif is_server_error(response.status_code):
+                    reason, code = '服务端错误', response.status_code
+                else:
+                    reason = None
+                if reason is None or attempt >= self.max_retries:
+                    if reason is not None:
+                        logger.error(f"❌ 请求 {key} 多次{reason}，放弃重试")
+                    return response
+                hint = retry_after_seconds(response.headers)
+            delay = self.backoff(attempt, hint)
+            logger.warning(f"请求 {key} {reason} ({code})，{delay:.2f} 秒后第 {attempt + 1} 次重试")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+# 进程内共享的调度器，同一应用的所有保存器共用令牌桶
+shared_scheduler = RequestScheduler()
@@ -1,11 +1,20 @@
 import lark_oapi as lark
 import json
 import logging
-import difflib
-from typing import Dict, List, Any, Optional, Union
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Any, Optional, Union
 from lark_oapi.api.bitable.v1 import *
 from lark_oapi.api.contact.v3 import *
 
+from dedup_tools.title_similarity import build_title_matcher, merge_matcher_stats
+from feishu_tools.record_mirror import FeishuRecordMirror
+from feishu_tools.request_scheduler import RequestScheduler, is_rate_limited, shared_scheduler
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -17,6 +26,26 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# 因单条记录的字段值不合法而拒绝整批写入的错误码，只有这类错误才二分定位问题记录；
+# 频率限制、鉴权、权限等表格级错误拆分后同样失败，整批标记为失败留待重试
+RECORD_REJECTION_CODES = {
+    1254000,  # WrongRequestJson
+    1254001,  # WrongRequestBody
+    1254060,  # TextFieldConvFail
+    1254061,  # NumberFieldConvFail
+    1254062,  # SingleSelectFieldConvFail
+    1254063,  # MultiSelectFieldConvFail
+    1254064,  # DatetimeFieldConvFail
+    1254065,  # CheckboxFieldConvFail
+    1254066,  # UserFieldConvFail
+    1254067,  # LinkFieldConvFail
+    1254068,  # URLFieldConvFail
+    1254069,  # AttachFieldConvFail
+    1254072,  # PhoneFieldConvFail
+    1254074,  # DuplexLinkFieldConvFail
+}
+
+
 class FeishuConfig:
     """飞书配置类"""
     def __init__(self):
@@ -26,6 +55,24 @@ class FeishuConfig:
         self.GW_TABLE_ID: str = "tblQ4sWd6zj5iFfC"
         self.GN_TABLE_ID: str = "tblcgYb7wnhvN11F"
         self.DUPLICATED_TABLE_ID: str = "tblwCE4E6QiS7373"
+        # 表格中"修改时间"类型字段的名称，用于本地镜像的增量同步；表格中没有该字段时每次全量同步
+        self.MODIFIED_TIME_FIELD: str = "最后更新时间"
+        # 增量同步拉取不到已删除的记录，距上次全量同步超过该天数时改为全量同步以清理镜像中已删除的记录
+        self.MIRROR_FULL_SYNC_DAYS: float = 7
+        
+        # 批量写入限制：飞书batch_create单次最多500条，请求体大小按序列化字节数留出余量
+        self.BATCH_MAX_RECORDS: int = 500
+        self.BATCH_MAX_BYTES: int = 5 * 1024 * 1024
+        # 同一表格分块上传的并发数：飞书对同一表格的并发写入会返回写冲突（1254291），默认逐批顺序写入
+        self.UPLOAD_WORKERS: int = 1
+        
+        # 被飞书拒绝的记录的本地隔离文件
+        self.QUARANTINE_PATH: str = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'quarantine', 'feishu_rejected.jsonl'
+        )
+        
+        # 更新提醒机器人webhook地址
+        self.WEBHOOK_URL: str = "https://open.feishu.cn/open-apis/bot/v2/hook/9d7f45c8-2214-4b0e-986d-878f2136bb73"
 
 
 class FeishuFields:
@@ -78,8 +125,33 @@ def build_feishu_client() -> lark.Client:
 class FeishuDataSaver:
     """飞书数据保存类"""
     
-    def __init__(self, client: lark.Client):
+    def __init__(self, client: lark.Client, mirror: Optional[FeishuRecordMirror] = None,
+                 scheduler: Optional[RequestScheduler] = None):
         self.client = client
+        # 请求调度器：按表格限流，频率限制时退避重试
+        self.scheduler = scheduler or shared_scheduler
+        # 已有记录的本地镜像，为None时每次直接从飞书拉取
+        self.mirror = mirror
+        # 本次运行中已同步过镜像的表格ID
+        self._synced_tables = set()
+        # 各表格是否有可用于增量同步的修改时间字段，只检查一次
+        self._modified_time_fields: Dict[str, bool] = {}
+        self._quarantine_lock = threading.Lock()
+        # 最近一次标题去重各剪枝阶段的统计（仅'cascade'后端）
+        self.last_dedup_stats = {}
+    
+    def _send(self, table_id: str, send: Callable[[], Any]) -> Any:
+        """
+        通过调度器发起请求
+        
+        Args:
+            table_id: 目标表格ID，与应用ID一起作为限流键
+            send: 发起请求并返回响应的函数
+            
+        Returns:
+            Any: 飞书响应
+        """
+        return self.scheduler.call((feishu_config.APP_ID, table_id), send)
     
     def _validate_data(self, news_data: List[Dict[str, Any]]) -> bool:
         """
@@ -134,22 +206,27 @@ class FeishuDataSaver:
         # 根据数据类型选择表格ID
         table_id = feishu_config.GN_TABLE_ID if data_type == 0 else feishu_config.GW_TABLE_ID
         
+        # client_token 使调度器对超时等网络异常的重试幂等，不会重复创建记录
         request = BatchCreateAppTableRecordRequest.builder() \
             .app_token(feishu_config.APP_TOKEN) \
             .table_id(table_id) \
+            .client_token(str(uuid.uuid4())) \
             .request_body(request_body) \
             .build()
         
         return request
     
-    def deduplicate_by_title_similarity(self, items, threshold=0.7, existing_titles=None):
+    def deduplicate_by_title_similarity(self, items, threshold=0.7, existing_titles=None, backend='difflib'):
         """
         根据标题相似度进行去重
         
         Args:
-            items: 待去重的数据列表
+            items: 待去重的数据列表（NewsItem 或包含 'title' 的字典）
             threshold: 相似度阈值，默认为0.7
             existing_titles: 已存在的标题列表，用于与飞书已有记录去重
+            backend: 标题匹配后端 ('difflib': 全量比较, 'lsh': 先用MinHash/LSH筛选候选再精确比较（候选为近似召回，可能漏判重复）,
+                     'cascade': 结果与'difflib'完全一致的逐级剪枝比较,
+                     'matrix': rapidfuzz批量矩阵打分，返回相似度最高的已有标题)
             
         Returns:
             tuple: (去重后的数据列表, 重复的数据列表)
@@ -157,103 +234,333 @@ class FeishuDataSaver:
         if not items:
             return [], []
         
-        # 移除标题为空的项
+        from feishu_tools.news_item import NewsItem
+        
+        # 移除标题为空的项；NewsItem 直接读取属性，dict 条目按键读取
         valid_items = []
+        current_titles = []
         for item in items:
-            title = item.get('title')
+            title = item.title if isinstance(item, NewsItem) else item.get('title')
             if title and str(title).strip():
                 valid_items.append(item)
+                current_titles.append(str(title).strip())
         
         if len(valid_items) <= 1:
             return valid_items, []
         
         to_keep = []
         duplicates = []
-        processed_titles = []
+        processed_matcher = build_title_matcher(backend)
+        existing_matcher = build_title_matcher(backend, existing_titles) if existing_titles else None
+        
+        # 批量后端在逐条比较前一次性为整封邮件的标题打分
+        processed_matcher.prepare(current_titles, threshold)
+        if existing_matcher:
+            existing_matcher.prepare(current_titles, threshold)
         
-        for item in valid_items:
-            current_title = str(item['title']).strip()
+        for item, current_title in zip(valid_items, current_titles):
             is_duplicate = False
             duplicate_title = None
             
             # 1. 检查是否与已处理的标题重复（邮件内去重）
-            for processed_title in processed_titles:
-                similarity = difflib.SequenceMatcher(None, current_title, processed_title).ratio()
-                if similarity >= threshold:
-                    is_duplicate = True
-                    duplicate_title = processed_title
-                    item['similarity'] = similarity
-                    logger.info(f"【邮件内去重】发现重复标题: '{current_title}' 与 '{processed_title}' 相似度: {similarity:.2f}")
-                    break
+            match = processed_matcher.find(current_title, threshold)
+            if match:
+                is_duplicate = True
+                duplicate_title, similarity = match
+                item['similarity'] = similarity
+                logger.info(f"【邮件内去重】发现重复标题: '{current_title}' 与 '{duplicate_title}' 相似度: {similarity:.2f}")
             
             # 2. 如果邮件内没有重复，检查是否与飞书已有记录重复
-            if not is_duplicate and existing_titles:
-                for existing_title in existing_titles:
-                    existing_title_str = str(existing_title).strip()
-                    similarity = difflib.SequenceMatcher(None, current_title, existing_title_str).ratio()
-                    if similarity >= threshold:
-                        is_duplicate = True
-                        duplicate_title = existing_title_str
-                        item['similarity'] = similarity
-                        logger.info(f"【飞书记录去重】发现重复标题: '{current_title}' 与 '{existing_title_str}' 相似度: {similarity:.2f}")
-                        break
+            if not is_duplicate and existing_matcher:
+                match = existing_matcher.find(current_title, threshold)
+                if match:
+                    is_duplicate = True
+                    duplicate_title, similarity = match
+                    item['similarity'] = similarity
+                    logger.info(f"【飞书记录去重】发现重复标题: '{current_title}' 与 '{duplicate_title}' 相似度: {similarity:.2f}")
             
             if not is_duplicate:
                 to_keep.append(item)
-                processed_titles.append(current_title)
+                processed_matcher.add(current_title)
             else:
                 item['duplicate_title'] = duplicate_title
                 duplicates.append(item)
         
+        self.last_dedup_stats = merge_matcher_stats(processed_matcher, existing_matcher)
+        if self.last_dedup_stats:
+            logger.info(f"【标题相似度剪枝统计】: {self.last_dedup_stats}")
         logger.info(f"【标题相似度去重完成】: 从 {len(valid_items)} 条记录中去重后保留 {len(to_keep)} 条，重复 {len(duplicates)} 条")
         return to_keep, duplicates
     
+    @staticmethod
+    def _field_text(value) -> Optional[str]:
+        """将飞书返回的文本字段（字符串或富文本片段列表）转换为字符串"""
+        if isinstance(value, list):
+            return ''.join(str(segment.get('text', '')) if isinstance(segment, dict) else str(segment) for segment in value)
+        return value
+    
+    @staticmethod
+    def _project_record(record: AppTableRecord) -> Optional[Dict[str, Any]]:
+        """
+        从飞书记录中提取去重所需的字段
+        
+        Args:
+            record: 飞书记录
+            
+        Returns:
+            Optional[Dict[str, Any]]: 包含 record_id/title/url/created_time/last_modified_time，无标题时返回None
+        """
+        fields = record.fields
+        if not isinstance(fields, dict) or FeishuFields.NEWS_TITLE not in fields:
+            return None
+        source = fields.get(FeishuFields.NEWS_SOURCE)
+        return {
+            'record_id': record.record_id,
+            'title': FeishuDataSaver._field_text(fields[FeishuFields.NEWS_TITLE]),
+            'url': source.get('link') if isinstance(source, dict) else None,
+            'created_time': record.created_time,
+            'last_modified_time': record.last_modified_time,
+        }
+    
+    def _iter_pages(self, fetch_page: Callable[[Optional[str]], Any]) -> Iterator[Dict[str, Any]]:
+        """
+        流式遍历分页接口，消费当前页的同时在后台预取下一页
+        
+        Args:
+            fetch_page: 根据page_token发起请求并返回响应的函数，首页传入None
+            
+        Yields:
+            Dict[str, Any]: 投影后的记录
+            
+        Raises:
+            RuntimeError: 任一页请求失败时抛出，避免调用方拿到不完整的记录集
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(fetch_page, None)
+            while future is not None:
+                response = future.result()
+                if not response.success():
+                    raise RuntimeError(f"code: {response.code}, msg: {response.msg}")
+                data = response.data
+                # 先发出下一页请求，再处理当前页
+                future = executor.submit(fetch_page, data.page_token) if data.has_more and data.page_token else None
+                for record in data.items or []:
+                    projected = self._project_record(record)
+                    if projected:
+                        yield projected
+    
+    def _search_records(self, table_id: str, modified_since: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        通过search接口分页拉取记录，可按修改时间过滤
+        
+        Args:
+            table_id: 飞书表格ID
+            modified_since: 只拉取该毫秒时间戳（按天）之后修改过的记录，为None时拉取全部
+            
+        Returns:
+            Optional[List[Dict[str, Any]]]: 投影后的记录列表，失败时返回None
+        """
+        body_builder = SearchAppTableRecordRequestBody.builder() \
+            .field_names([FeishuFields.NEWS_TITLE, FeishuFields.NEWS_SOURCE]) \
+            .automatic_fields(True)
+        if modified_since is not None:
+            condition = Condition.builder() \
+                .field_name(feishu_config.MODIFIED_TIME_FIELD) \
+                .operator("isGreaterEqual") \
+                .value(["ExactDate", str(modified_since)]) \
+                .build()
+            body_builder = body_builder.filter(FilterInfo.builder().conjunction("and").conditions([condition]).build())
+        request_body = body_builder.build()
+        
+        def fetch_page(page_token):
+            request_builder = SearchAppTableRecordRequest.builder() \
+                .app_token(feishu_config.APP_TOKEN) \
+                .table_id(table_id) \
+                .page_size(500) \
+                .request_body(request_body)
+            if page_token:
+                request_builder = request_builder.page_token(page_token)
+            request = request_builder.build()
+            return self._send(table_id, lambda: self.client.bitable.v1.app_table_record.search(request))
+        
+        try:
+            return list(self._iter_pages(fetch_page))
+        except RuntimeError as e:
+            logger.error(f"❌ 拉取飞书表格记录失败, {str(e)}")
+            return None
+    
+    def _has_modified_time_field(self, table_id: str) -> Optional[bool]:
+        """
+        检查表格中是否有名为 MODIFIED_TIME_FIELD 的"修改时间"字段，结果按表格缓存
+        
+        Args:
+            table_id: 飞书表格ID
+            
+        Returns:
+            Optional[bool]: 字段存在且类型为修改时间时返回True，请求失败时返回None（下次再检查）
+        """
+        if table_id in self._modified_time_fields:
+            return self._modified_time_fields[table_id]
+        
+        field_type = None
+        page_token = None
+        while True:
+            request_builder = ListAppTableFieldRequest.builder() \
+                .app_token(feishu_config.APP_TOKEN) \
+                .table_id(table_id) \
+                .page_size(100)
+            if page_token:
+                request_builder = request_builder.page_token(page_token)
+            request = request_builder.build()
+            try:
+                response = self._send(table_id, lambda: self.client.bitable.v1.app_table_field.list(request))
+            except Exception as e:
+                logger.error(f"❌ 获取表格字段列表过程中发生异常: {str(e)}")
+                return None
+            if not response.success():
+                logger.error(f"❌ 获取表格字段列表失败, code: {response.code}, msg: {response.msg}")
+                return None
+            for field in response.data.items or []:
+                if field.field_name == feishu_config.MODIFIED_TIME_FIELD:
+                    field_type = field.type
+            if not (response.data.has_more and response.data.page_token):
+                break
+            page_token = response.data.page_token
+        
+        # 1002 为"修改时间"字段类型
+        available = field_type == 1002
+        if not available:
+            reason = "不存在" if field_type is None else f"类型为 {field_type} 而不是修改时间"
+            logger.warning(f"表格 {table_id} 的「{feishu_config.MODIFIED_TIME_FIELD}」字段{reason}，"
+                           f"本地镜像无法增量同步，每次运行都将全量同步；请在表格中添加该修改时间字段")
+        self._modified_time_fields[table_id] = available
+        return available
+    
+    def _full_sync_due(self, table_id: str) -> bool:
+        """距上次全量同步是否已超过 MIRROR_FULL_SYNC_DAYS 天（从未全量同步过视为已到期）"""
+        last_full_sync = self.mirror.get_last_full_sync(table_id)
+        if last_full_sync is None:
+            return True
+        return time.time() - last_full_sync >= feishu_config.MIRROR_FULL_SYNC_DAYS * 86400
+    
+    def sync_existing_records(self, data_type: int, full: bool = False) -> bool:
+        """
+        将飞书表格已有记录增量同步到本地镜像
+        
+        按"修改时间"字段拉取上次同步水位当天及之后修改过的记录并写入镜像。
+        增量同步拉取不到飞书中已删除的记录，这些记录会一直留在镜像中参与去重，因此距上次全量同步
+        超过 MIRROR_FULL_SYNC_DAYS 天时改为全量同步，用飞书当前的记录替换镜像，清理已删除的记录。
+        从未同步过、指定full、表格没有修改时间字段或增量拉取失败时同样进行全量同步。
+        
+        Args:
+            data_type: 数据类型 (0: 境内数据, 1: 境外数据)
+            full: 是否强制全量同步
+            
+        Returns:
+            bool: 同步成功返回True
+        """
+        if self.mirror is None:
+            return False
+        table_id = feishu_config.GN_TABLE_ID if data_type == 0 else feishu_config.GW_TABLE_ID
+        try:
+            watermark = None if full else self.mirror.get_watermark(table_id)
+            if watermark is not None and self._full_sync_due(table_id):
+                logger.info(f"距上次全量同步已超过 {feishu_config.MIRROR_FULL_SYNC_DAYS} 天，改为全量同步")
+                watermark = None
+            if watermark is not None and self._has_modified_time_field(table_id) is False:
+                watermark = None
+            records = None
+            if watermark is not None:
+                records = self._search_records(table_id, modified_since=watermark)
+                if records is None:
+                    logger.warning("增量同步失败，改为全量同步")
+            replace_all = records is None
+            if replace_all:
+                records = self._search_records(table_id)
+                if records is None:
+                    return False
+            
+            self.mirror.upsert_records(table_id, records, replace_all=replace_all)
+            modified_times = [r['last_modified_time'] for r in records if r['last_modified_time']]
+            self.mirror.set_watermark(table_id, max(modified_times + [watermark or 0]) or None, full=replace_all)
+            self._synced_tables.add(table_id)
+            logger.info(f"✅ 本地镜像{'全量' if replace_all else '增量'}同步完成! 拉取 {len(records)} 条记录")
+            return True
+        except Exception as e:
+            logger.error(f"❌ 同步本地镜像过程中发生异常: {str(e)}")
+            logger.exception("异常堆栈信息:")
+            return False
+    
+    def invalidate_mirror_sync(self) -> None:
+        """标记本地镜像需要重新同步，下次获取已有记录时各表格会再增量同步一次（常驻进程使用）"""
+        self._synced_tables.clear()
+    
     def get_existing_records(self, data_type: int):
         """
         获取飞书表格中已有的记录
         
+        配置了本地镜像时，每个表格在本次运行中只增量同步一次，之后直接读取镜像。
+        
         Args:
             data_type: 数据类型 (0: 境内数据, 1: 境外数据)
             
         Returns:
             list: 已有的记录列表
         """
-        try:
-            # 根据数据类型选择表格ID
+        if self.mirror is not None:
             table_id = feishu_config.GN_TABLE_ID if data_type == 0 else feishu_config.GW_TABLE_ID
-            
-            # 构建请求
-            request = ListAppTableRecordRequest.builder()
-            request = request.app_token(feishu_config.APP_TOKEN)
-            request = request.table_id(table_id)
-            request = request.page_size(1000)  # 设置较大的页面大小，确保获取所有记录
-            request = request.build()
-            
-            # 发起请求
-            response = self.client.bitable.v1.app_table_record.list(request)
-            
-            # 处理响应
-            if response.success():
-                records = response.data.items
-                existing_records = []
-                if records:
-                    for record in records:
-                        fields = record.fields
-                        if isinstance(fields, dict) and FeishuFields.NEWS_TITLE in fields:
-                            existing_records.append({
-                                'title': fields[FeishuFields.NEWS_TITLE],
-                                'record_id': record.record_id
-                            })
-                logger.info(f"✅ 获取飞书表格已有记录成功! 共 {len(existing_records)} 条记录")
+            if table_id in self._synced_tables or self.sync_existing_records(data_type):
+                existing_records = self.mirror.load_records(table_id)
+                logger.info(f"✅ 从本地镜像读取已有记录成功! 共 {len(existing_records)} 条记录")
                 return existing_records
-            else:
-                logger.error(f"❌ 获取飞书表格已有记录失败, code: {response.code}, msg: {response.msg}")
-                return []
+            logger.warning("本地镜像同步失败，直接从飞书获取已有记录")
+        
+        try:
+            existing_records = list(self.iter_existing_records(data_type))
+            logger.info(f"✅ 获取飞书表格已有记录成功! 共 {len(existing_records)} 条记录")
+            return existing_records
+        except RuntimeError as e:
+            logger.error(f"❌ 获取飞书表格已有记录失败, {str(e)}")
+            return []
         except Exception as e:
             logger.error(f"❌ 获取飞书表格已有记录过程中发生异常: {str(e)}")
             logger.exception("异常堆栈信息:")
             return []
     
+    def iter_existing_records(self, data_type: int, page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        分页流式读取飞书表格中已有的记录
+        
+        只请求标题和来源字段，按 has_more/page_token 读取全部分页，
+        消费当前页时后台预取下一页，内存占用只与单页大小相关。
+        
+        Args:
+            data_type: 数据类型 (0: 境内数据, 1: 境外数据)
+            page_size: 每页记录数，飞书上限为500
+            
+        Yields:
+            Dict[str, Any]: 包含 record_id/title/url 的记录
+            
+        Raises:
+            RuntimeError: 分页请求失败时抛出
+        """
+        # 根据数据类型选择表格ID
+        table_id = feishu_config.GN_TABLE_ID if data_type == 0 else feishu_config.GW_TABLE_ID
+        field_names = json.dumps([FeishuFields.NEWS_TITLE, FeishuFields.NEWS_SOURCE], ensure_ascii=False)
+        
+        def fetch_page(page_token):
+            request = ListAppTableRecordRequest.builder() \
+                .app_token(feishu_config.APP_TOKEN) \
+                .table_id(table_id) \
+                .field_names(field_names) \
+                .page_size(page_size)
+            if page_token:
+                request = request.page_token(page_token)
+            request = request.build()
+            return self._send(table_id, lambda: self.client.bitable.v1.app_table_record.list(request))
+        
+        yield from self._iter_pages(fetch_page)
+    
     def save_duplicate_record(self, duplicate_info):
         """
         保存重复记录到DUPLICATED_TABLE_ID表格
@@ -264,76 +571,133 @@ class FeishuDataSaver:
         Returns:
             bool: 保存成功返回True，失败返回False
         """
-        try:
-            # 构建记录
-            record_builder = AppTableRecord.builder()
-            record_builder = record_builder.fields(duplicate_info)
-            record = record_builder.build()
-            
-            # 构建请求体
-            body_builder = BatchCreateAppTableRecordRequestBody.builder()
-            body_builder = body_builder.records([record])
-            request_body = body_builder.build()
-            
-            # 构建请求
-            request_builder = BatchCreateAppTableRecordRequest.builder()
-            request_builder = request_builder.app_token(feishu_config.APP_TOKEN)
-            request_builder = request_builder.table_id(feishu_config.DUPLICATED_TABLE_ID)
-            request_builder = request_builder.request_body(request_body)
-            request = request_builder.build()
+        return self.save_duplicate_records([duplicate_info])
+    
+    def save_duplicate_records(self, duplicate_infos: List[Dict[str, Any]]) -> bool:
+        """
+        批量保存重复记录到DUPLICATED_TABLE_ID表格
+        
+        Args:
+            duplicate_infos: 重复记录信息列表，超过单批上限时自动分批
             
-            # 发起请求
-            response = self.client.bitable.v1.app_table_record.batch_create(request)
+        Returns:
+            bool: 全部保存成功返回True，否则返回False
+        """
+        success = True
+        for chunk in self._chunk_data(duplicate_infos):
+            try:
+                # 构建记录
+                records = self._build_records(chunk)
+                
+                # 构建请求体
+                body_builder = BatchCreateAppTableRecordRequestBody.builder()
+                body_builder = body_builder.records(records)
+                request_body = body_builder.build()
+                
+                # 构建请求
+                request_builder = BatchCreateAppTableRecordRequest.builder()
+                request_builder = request_builder.app_token(feishu_config.APP_TOKEN)
+                request_builder = request_builder.table_id(feishu_config.DUPLICATED_TABLE_ID)
+                request_builder = request_builder.client_token(str(uuid.uuid4()))
+                request_builder = request_builder.request_body(request_body)
+                request = request_builder.build()
+                
+                # 发起请求
+                response = self._send(feishu_config.DUPLICATED_TABLE_ID, lambda: self.client.bitable.v1.app_table_record.batch_create(request))
+                
+                # 处理响应
+                if response.success():
+                    logger.info(f"✅ 保存重复记录成功! 共 {len(chunk)} 条")
+                else:
+                    logger.error(f"❌ 保存重复记录失败, code: {response.code}, msg: {response.msg}")
+                    success = False
+            except Exception as e:
+                logger.error(f"❌ 保存重复记录过程中发生异常: {str(e)}")
+                logger.exception("异常堆栈信息:")
+                success = False
+        return success
+    
+    def duplicate_writer(self, max_batch_size: Optional[int] = None) -> 'DuplicateRecordWriter':
+        """
+        创建重复记录缓冲写入器
+        
+        Args:
+            max_batch_size: 缓冲区达到该条数时自动提交，默认为单批上限
             
-            # 处理响应
-            if response.success():
-                logger.info("✅ 保存重复记录成功!")
-                return True
-            else:
-                logger.error(f"❌ 保存重复记录失败, code: {response.code}, msg: {response.msg}")
-                return False
-        except Exception as e:
-            logger.error(f"❌ 保存重复记录过程中发生异常: {str(e)}")
-            logger.exception("异常堆栈信息:")
-            return False
+        Returns:
+            DuplicateRecordWriter: 缓冲写入器，可作为上下文管理器使用
+        """
+        return DuplicateRecordWriter(self, max_batch_size)
     
-    def save_data(self, news_data: List[Dict[str, Any]], data_type: int = 1) -> Optional[List[AppTableRecord]]:
+    @staticmethod
+    def _chunk_data(news_data: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
         """
-        保存数据到飞书多维表格
+        按记录数和序列化后的字节数将数据切分为多个批次
         
         Args:
             news_data: 要保存的数据列表
-            data_type: 数据类型 (0: 境内数据, 1: 境外数据, 默认为境外数据)
+            
+        Returns:
+            List[List[Dict[str, Any]]]: 按原顺序切分的批次列表，单条超限的记录独占一个批次
+        """
+        chunks = []
+        current = []
+        current_bytes = 0
+        for item in news_data:
+            # 每条记录序列化为 {"fields": {...}}，外加分隔逗号
+            item_bytes = len(json.dumps({"fields": item}, ensure_ascii=False, default=str).encode('utf-8')) + 1
+            if current and (len(current) >= feishu_config.BATCH_MAX_RECORDS
+                            or current_bytes + item_bytes > feishu_config.BATCH_MAX_BYTES):
+                chunks.append(current)
+                current = []
+                current_bytes = 0
+            current.append(item)
+            current_bytes += item_bytes
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    def _save_chunk(self, chunk: List[Dict[str, Any]], data_type: int) -> Optional[List[AppTableRecord]]:
+        """
+        上传单个批次
+        
+        Args:
+            chunk: 单个批次的数据
+            data_type: 数据类型 (0: 境内数据, 1: 境外数据)
             
         Returns:
             Optional[List[AppTableRecord]]: 创建的记录列表，失败时返回None
         """
-        # 验证数据
-        if not self._validate_data(news_data):
-            return None
+        created_records, _ = self._try_save_chunk(chunk, data_type)
+        return created_records
+    
+    def _try_save_chunk(self, chunk: List[Dict[str, Any]], data_type: int):
+        """
+        上传单个批次并返回失败原因
         
+        Args:
+            chunk: 单个批次的数据
+            data_type: 数据类型 (0: 境内数据, 1: 境外数据)
+            
+        Returns:
+            tuple: (创建的记录列表或None, 失败信息字典或None)；
+                   失败信息中 rejected 为True表示飞书因记录内容不合法拒绝了这批数据，
+                   为False表示请求异常或表格级错误（频率限制、鉴权、权限等）
+        """
+        table_id = feishu_config.GN_TABLE_ID if data_type == 0 else feishu_config.GW_TABLE_ID
         try:
             # 构建记录
-            records = self._build_records(news_data)
+            records = self._build_records(chunk)
             
             # 构建请求
             request = self._build_request(records, data_type)
             
             # 发起请求
-            response = self.client.bitable.v1.app_table_record.batch_create(request)
+            response = self._send(table_id, lambda: self.client.bitable.v1.app_table_record.batch_create(request))
             
             # 处理响应
             if response.success():
                 created_records = response.data.records
-                logger.info(f"✅ 批量保存成功!")
-                logger.info(f"   共处理 {len(news_data)} 条记录")
-                logger.info(f"   成功创建 {len(created_records)} 条记录")
-                
-                # 输出每条记录的ID
-                for i, record in enumerate(created_records):
-                    logger.info(f"   记录 {i+1} - Record ID: {record.record_id}")
-                
-                return created_records
             else:
                 logger.error(f"❌ 批量保存失败, code: {response.code}, msg: {response.msg}")
                 
@@ -344,12 +708,223 @@ class FeishuDataSaver:
                 except Exception as e:
                     logger.error(f"   解析错误信息失败: {str(e)}")
                     logger.error(f"   原始错误响应: {response.raw.content}")
+                rejected = response.code in RECORD_REJECTION_CODES and not is_rate_limited(
+                    getattr(response.raw, 'status_code', None), response.code)
+                return None, {'rejected': rejected, 'code': response.code, 'msg': response.msg}
                 
         except Exception as e:
             logger.error(f"❌ 保存过程中发生异常: {str(e)}")
             logger.exception("异常堆栈信息:")
+            return None, {'rejected': False, 'code': None, 'msg': str(e)}
+        
+        # 新建记录直接写入本地镜像，同一次运行中后续邮件无需重新同步即可参与去重；
+        # 记录已在飞书创建，镜像写入失败不能算作上传失败，否则重跑会重复创建
+        if self.mirror is not None:
+            try:
+                self.mirror.upsert_records(table_id, filter(None, map(self._project_record, created_records)))
+            except Exception as e:
+                logger.error(f"❌ 新建记录写入本地镜像失败: {str(e)}，下次读取已有记录时重新同步")
+                self._synced_tables.discard(table_id)
+        return created_records, None
+    
+    def _quarantine(self, item: Dict[str, Any], data_type: int, error: Dict[str, Any]) -> None:
+        """将被飞书拒绝的单条记录追加写入本地隔离文件（JSON Lines）"""
+        os.makedirs(os.path.dirname(feishu_config.QUARANTINE_PATH), exist_ok=True)
+        entry = {
+            'quarantined_at': datetime.now().isoformat(timespec='seconds'),
+            'data_type': data_type,
+            'code': error.get('code'),
+            'msg': error.get('msg'),
+            'fields': item,
+        }
+        with self._quarantine_lock:
+            with open(feishu_config.QUARANTINE_PATH, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+    
+    def _bisect_chunk(self, indexed_chunk: List[tuple], data_type: int, statuses: List[Dict[str, Any]]) -> None:
+        """
+        上传批次，被拒绝时二分拆分直到定位出问题记录
+        
+        Args:
+            indexed_chunk: (原始序号, 数据) 列表
+            data_type: 数据类型 (0: 境内数据, 1: 境外数据)
+            statuses: 按原始序号写入的状态列表
+        """
+        created_records, error = self._try_save_chunk([item for _, item in indexed_chunk], data_type)
+        if created_records is not None:
+            for (index, _), record in zip(indexed_chunk, created_records):
+                statuses[index] = {'index': index, 'status': 'created', 'record_id': record.record_id, 'error': None}
+            return
+        
+        if not error['rejected']:
+            # 请求异常（网络等）或表格级错误（频率限制、鉴权等），拆分也无济于事，整批标记为失败
+            message = error['msg'] if error['code'] is None else f"code: {error['code']}, msg: {error['msg']}"
+            for index, _ in indexed_chunk:
+                statuses[index] = {'index': index, 'status': 'failed', 'record_id': None, 'error': message}
+            return
         
-        return None
+        if len(indexed_chunk) == 1:
+            index, item = indexed_chunk[0]
+            self._quarantine(item, data_type, error)
+            statuses[index] = {'index': index, 'status': 'quarantined', 'record_id': None,
+                               'error': f"code: {error['code']}, msg: {error['msg']}"}
+            logger.warning(f"第 {index + 1} 条记录被飞书拒绝，已写入隔离文件")
+            return
+        
+        middle = len(indexed_chunk) // 2
+        logger.info(f"批次被拒绝，拆分为 {middle} + {len(indexed_chunk) - middle} 条重试")
+        self._bisect_chunk(indexed_chunk[:middle], data_type, statuses)
+        self._bisect_chunk(indexed_chunk[middle:], data_type, statuses)
+    
+    def save_data_with_bisection(self, news_data: List[Dict[str, Any]], data_type: int = 1) -> List[Dict[str, Any]]:
+        """
+        保存数据到飞书多维表格，批次因记录内容不合法被拒绝时二分定位问题记录，其余记录照常上传
+
+        k 条问题记录只需 O(k log n) 次额外请求；问题记录写入 FeishuConfig.QUARANTINE_PATH 隔离文件。
+        频率限制、鉴权等表格级错误不拆分，整批记为 'failed'。
+        
+        Args:
+            news_data: 要保存的数据列表
+            data_type: 数据类型 (0: 境内数据, 1: 境外数据, 默认为境外数据)
+            
+        Returns:
+            List[Dict[str, Any]]: 与输入一一对应的状态列表，每项包含
+                index, status ('created' / 'quarantined' / 'failed'), record_id, error
+        """
+        if not self._validate_data(news_data):
+            return []
+        
+        statuses: List[Dict[str, Any]] = [None] * len(news_data)
+        indexed_chunks = []
+        offset = 0
+        for chunk in self._chunk_data(news_data):
+            indexed_chunks.append(list(enumerate(chunk, start=offset)))
+            offset += len(chunk)
+        
+        workers = min(feishu_config.UPLOAD_WORKERS, len(indexed_chunks))
+        if workers <= 1:
+            for indexed_chunk in indexed_chunks:
+                self._bisect_chunk(indexed_chunk, data_type, statuses)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda chunk: self._bisect_chunk(chunk, data_type, statuses), indexed_chunks))
+        
+        created = sum(1 for status in statuses if status['status'] == 'created')
+        quarantined = sum(1 for status in statuses if status['status'] == 'quarantined')
+        failed = len(statuses) - created - quarantined
+        logger.info(f"✅ 分批保存完成! 共处理 {len(news_data)} 条记录，成功 {created} 条，隔离 {quarantined} 条，失败 {failed} 条")
+        return statuses
+    
+    def save_data(self, news_data: List[Dict[str, Any]], data_type: int = 1) -> Optional[List[AppTableRecord]]:
+        """
+        保存数据到飞书多维表格
+        
+        数据按记录数和请求体大小自动分块，默认逐批顺序上传（UPLOAD_WORKERS 大于1时并发），
+        返回结果按输入顺序合并。
+        
+        Args:
+            news_data: 要保存的数据列表
+            data_type: 数据类型 (0: 境内数据, 1: 境外数据, 默认为境外数据)
+            
+        Returns:
+            Optional[List[AppTableRecord]]: 创建的记录列表，任一批次失败时返回None
+        """
+        # 验证数据
+        if not self._validate_data(news_data):
+            return None
+        
+        chunks = self._chunk_data(news_data)
+        if len(chunks) > 1:
+            logger.info(f"数据分为 {len(chunks)} 个批次上传")
+        workers = min(feishu_config.UPLOAD_WORKERS, len(chunks))
+        if workers <= 1:
+            results = [self._save_chunk(chunk, data_type) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(lambda chunk: self._save_chunk(chunk, data_type), chunks))
+        
+        failed = [i + 1 for i, result in enumerate(results) if result is None]
+        if failed:
+            saved = sum(len(result) for result in results if result is not None)
+            logger.error(f"❌ 批量保存失败! 第 {failed} 批次失败，其余批次已创建 {saved} 条记录")
+            return None
+        
+        created_records = [record for result in results for record in result]
+        logger.info(f"✅ 批量保存成功!")
+        logger.info(f"   共处理 {len(news_data)} 条记录")
+        logger.info(f"   成功创建 {len(created_records)} 条记录")
+        
+        # 输出每条记录的ID
+        for i, record in enumerate(created_records):
+            logger.info(f"   记录 {i+1} - Record ID: {record.record_id}")
+        
+        return created_records
+
+
+class DuplicateRecordWriter:
+    """
+    重复记录缓冲写入器
+    
+    add() 只写入内存缓冲区，缓冲区满或调用 flush() 时把整批记录交给后台线程
+    合并为 batch_create 请求；close()（或退出 with 块）时提交剩余记录并等待全部完成。
+    """
+    
+    def __init__(self, saver: FeishuDataSaver, max_batch_size: Optional[int] = None):
+        self.saver = saver
+        self.max_batch_size = max_batch_size or feishu_config.BATCH_MAX_RECORDS
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._futures = []
+    
+    def __enter__(self) -> 'DuplicateRecordWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def add(self, duplicate_info: Dict[str, Any]) -> None:
+        """
+        加入一条重复记录，缓冲区满时自动提交
+        
+        Args:
+            duplicate_info: 重复记录信息，包含 "重复记录" 字段
+        """
+        with self._lock:
+            self._buffer.append(duplicate_info)
+            full = len(self._buffer) >= self.max_batch_size
+        if full:
+            self.flush()
+    
+    def flush(self) -> None:
+        """将缓冲区中的记录提交给后台线程写入，不等待结果"""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+            if batch:
+                self._futures.append(self._executor.submit(self.saver.save_duplicate_records, batch))
+    
+    def wait(self) -> bool:
+        """
+        等待已提交的批次全部完成
+        
+        Returns:
+            bool: 全部保存成功返回True
+        """
+        with self._lock:
+            futures, self._futures = self._futures, []
+        return all([future.result() for future in futures])
+    
+    def close(self) -> bool:
+        """
+        提交剩余记录并等待全部完成
+        
+        Returns:
+            bool: 全部保存成功返回True
+        """
+        self.flush()
+        success = self.wait()
+        self._executor.shutdown()
+        return success
 
 
 def batch_save_data(client: lark.Client, news_data: Union[Dict[str, Any], List[Dict[str, Any]]], data_type: int = 1) -> Optional[List[AppTableRecord]]:
@@ -400,6 +975,17 @@ def get_field_name(field_enum: str) -> str:
     return field_map.get(field_enum, field_enum)
 
 
+def build_webhook_payload(total_updated: int, gn_updated: int, gw_updated: int, reviewer: str) -> Dict[str, Any]:
+    """构建飞书webhook通知消息体"""
+    message = f"今日动态更新{total_updated}条：境内{gn_updated}条，境外{gw_updated}条。请{reviewer}同学前往处理！"
+    return {
+        "msg_type": "text",
+        "content": {
+            "text": message
+        }
+    }
+
+
 def send_feishu_webhook_notification(total_updated: int, gn_updated: int, gw_updated: int, reviewer: str) -> bool:
     """发送飞书webhook通知
     
@@ -414,18 +1000,10 @@ def send_feishu_webhook_notification(total_updated: int, gn_updated: int, gw_upd
     """
     import requests
     
-    webhook_url = "https://open.feishu.cn/open-apis/bot/v2/hook/9d7f45c8-2214-4b0e-986d-878f2136bb73"
-    message = f"今日动态更新{total_updated}条：境内{gn_updated}条，境外{gw_updated}条。请{reviewer}同学前往处理！"
-    
     try:
-        payload = {
-            "msg_type": "text",
-            "content": {
-                "text": message
-            }
-        }
+        payload = build_webhook_payload(total_updated, gn_updated, gw_updated, reviewer)
         
-        response = requests.post(webhook_url, json=payload, headers={"Content-Type": "application/json"})
+        response = requests.post(feishu_config.WEBHOOK_URL, json=payload, headers={"Content-Type": "application/json"})
         response.raise_for_status()  # 检查请求是否成功
         logger.info(f"飞书webhook发送成功: {response.json()}")
         return True
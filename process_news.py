@@ -1,19 +1,30 @@
 import os
 import sys
+import signal
+import threading
 import logging
-import pandas as pd
+import argparse
 
 # 添加当前目录到系统路径，以便导入email_tools和feishu_tools
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # 导入邮件相关类
-from email_tools.email_reader import EmailConfig, DataConfig, EmailProcessor
+from email_tools.email_reader import EmailConfig, DataConfig
+from email_tools.imap_pool import IMAPConnectionPool
+from email_tools.idle_daemon import IdleIngestionDaemon
+from email_tools.uid_checkpoint import UIDCheckpoint
+from email_tools.ingest_ledger import IngestionLedger
+from email_tools.offline_source import iter_offline_emails
+from email_tools.parse_pool import AttachmentParsePool
+from email_tools.pipeline import Stage, StagedPipeline
 
 # 添加项目根目录到系统路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # 导入飞书相关类
 from feishu_tools.save_data_to_feishu import FeishuDataSaver, FeishuConfig, FeishuFields, build_feishu_client, send_feishu_webhook_notification
+from feishu_tools.record_mirror import FeishuRecordMirror
+from feishu_tools.record_builder import build_news_items
 
 # 配置日志
 logging.basicConfig(
@@ -25,186 +36,403 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 写入飞书时读取的列，解析附件时与各类别的目标列一起保留，其余列不解码
+NEWS_COLUMNS = ('网站名称', '文章链接地址', '标题', '标题(译文)', '正文')
 
 
+def record_ingestion(ledger, email_data, final_items, statuses):
+    """
+    将本封邮件各附件的处理结果写入台账
 
-def main():
-    """主函数"""
+    附件的全部记录都已创建、隔离或判定为重复时才记为已入库，有失败记录的附件下次重跑时会重新处理。
+    """
+    outcomes = {
+        table['sha256']: {'rows': len(table['dataframe']), 'created': 0, 'record_ids': [], 'failed': False}
+        for table in email_data['tables'] if table.get('sha256')
+    }
+    for item, status in zip(final_items, statuses):
+        outcome = outcomes.get(item.attachment)
+        if outcome is None:
+            continue
+        if status['status'] == 'created':
+            outcome['created'] += 1
+            outcome['record_ids'].append(status['record_id'])
+        elif status['status'] == 'failed':
+            outcome['failed'] = True
+
+    all_done = True
+    for table in email_data['tables']:
+        outcome = outcomes.get(table.get('sha256'))
+        if outcome is None or outcome['failed']:
+            all_done = False
+            continue
+        ledger.record_attachment(table['sha256'], email_data.get('message_id'), table['filename'],
+                                 outcome['rows'], outcome['created'], outcome['record_ids'])
+    if all_done:
+        ledger.record_message(email_data.get('message_id'), email_data.get('subject'))
+
+
+class PendingTitles:
+    """
+    已通过去重、尚未上传完成的标题
+
+    流水线中下一封邮件的去重与上一封的上传并行，上传完成前这些标题还不在本地镜像里，
+    去重时需要一并比较；上传结束后移除，此时成功创建的记录已写入镜像（save_data_with_bisection
+    在返回前写入），去重时须先读取这里的标题再读取镜像。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._titles = {}
+
+    def add(self, key, category, titles):
+        with self._lock:
+            self._titles[key] = (category, list(titles))
+
+    def discard(self, key):
+        with self._lock:
+            self._titles.pop(key, None)
+
+    def titles(self, category):
+        with self._lock:
+            return [title for item_category, titles in self._titles.values() if item_category == category
+                    for title in titles]
+
+
+def dedup_email_items(email_data, feishu_saver, duplicate_writer, ledger=None, pending_titles=None, key=None):
+    """
+    构建一封邮件的新闻条目并去重，重复记录写入重复记录表
+
+    参数:
+        email_data: process_email / fetch_emails 返回的邮件数据
+        feishu_saver: FeishuDataSaver 对象
+        duplicate_writer: 重复记录缓冲写入器
+        ledger: IngestionLedger 对象，为None时不记录处理结果
+        pending_titles: PendingTitles 对象，流水线模式下与尚未上传完成的标题一并去重
+        key: 本封邮件在 pending_titles 中的键
+
+    返回:
+        tuple: (category, final_items)，无有效数据时返回 (None, None)
+    """
+    if not email_data or not email_data['tables']:
+        if ledger is not None and email_data and email_data.get('skipped_attachments'):
+            # 附件都已入库，补记邮件级别的完成状态
+            ledger.record_message(email_data.get('message_id'), email_data.get('subject'))
+        logger.warning("邮件无有效表格数据，跳过")
+        return None, None
+
+    # 处理表格数据：按列构建飞书记录，识别境内数据0还是境外数据1
+    category = email_data['category']
+    items_to_process = []
+    for table in email_data['tables']:
+        items_to_process.extend(build_news_items(table['dataframe'], category, attachment=table.get('sha256')))
+
+    # 1. 对邮件内的数据进行标题相似度去重
+    unique_items, _ = feishu_saver.deduplicate_by_title_similarity(items_to_process, threshold=0.5, backend='cascade')
+
+    # 2. 获取飞书表格中已有的记录；先读上传中的标题再读镜像：上传线程先写入镜像再移除标题，
+    #    两次读取之间完成上传的标题必然出现在随后读取的镜像中
+    in_flight_titles = pending_titles.titles(category) if pending_titles is not None else []
+    existing_records = feishu_saver.get_existing_records(category)
+    existing_titles = [record['title'] for record in existing_records if 'title' in record]
+    existing_titles.extend(in_flight_titles)
+
+    # 3. 与飞书已有记录进行标题相似度去重；'lsh' 为近似召回，阈值0.5下会漏掉真实重复，这里使用结果不变的 'cascade'
+    final_items, duplicate_items = feishu_saver.deduplicate_by_title_similarity(unique_items, existing_titles=existing_titles, threshold=0.5, backend='cascade')
+    if pending_titles is not None:
+        pending_titles.add(key, category, (item.title for item in final_items))
+
+    # 4. 处理重复记录，保存到DUPLICATED_TABLE_ID表格
+    for item in duplicate_items:
+        category_text = '境内' if item.category == 0 else '境外'
+        duplicate_info = {
+            '重复记录': f"{category_text}：{item.title}（已有重复记录的标题：{item.duplicate_title or ''}）"
+        }
+        # 添加原文标题、动态原文、动态来源、审核人文本字段
+        record = item.to_fields()
+        for field in (FeishuFields.NEWS_TITLE, FeishuFields.NEWS_CONTENT, FeishuFields.NEWS_SOURCE,
+                      FeishuFields.REVIEWER_TEXT):
+            duplicate_info[field] = record[field]
+        # 添加相似度字段
+        if item.similarity is not None:
+            duplicate_info['相似度'] = str(round(item.similarity, 2))
+        duplicate_writer.add(duplicate_info)
+    # 本封邮件的重复记录在后台批量写入
+    duplicate_writer.flush()
+    return category, final_items
+
+
+def upload_email_items(email_data, category, final_items, feishu_saver, ledger=None):
+    """
+    将去重后的条目写入飞书并记录台账
+
+    返回:
+        tuple: (category, created_count, ok)，有记录上传失败时 ok 为False，本封邮件需要重试
+    """
+    # 5. 准备保存到飞书的数据，只在这里生成飞书字段字典
+    processed_data = [item.to_fields() for item in final_items]
+
+    # 保存数据到飞书
+    if processed_data:
+        logger.info(f"准备保存 {len(processed_data)} 条记录到飞书")
+        # 根据数据类型选择表格 (category: 0=境内, 1=境外)
+        # 批次被拒绝时二分定位问题记录，其余记录照常上传，问题记录写入隔离文件
+        statuses = feishu_saver.save_data_with_bisection(processed_data, data_type=category)
+        created_count = sum(1 for status in statuses if status['status'] == 'created')
+        failed_count = sum(1 for status in statuses if status['status'] == 'failed')
+        if ledger is not None and statuses:
+            record_ingestion(ledger, email_data, final_items, statuses)
+
+        if created_count:
+            logger.info(f"数据保存到飞书成功 {created_count}/{len(processed_data)} 条")
+            # 标记邮件为已读
+            # logger.info("标记邮件为已读")
+            # email_processor.mark_email_as_read(email_id)
+        else:
+            logger.error("数据保存到飞书失败")
+        if failed_count:
+            logger.error(f"{failed_count} 条记录上传失败，本封邮件下次重试")
+        return category, created_count, bool(statuses) and not failed_count
+    else:
+        logger.warning("无有效数据可保存到飞书")
+        if ledger is not None:
+            record_ingestion(ledger, email_data, [], [])
+        return category, 0, True
+
+
+def process_email_data(email_data, data_config, feishu_saver, duplicate_writer, ledger=None):
+    """
+    处理一封已解析的邮件：表格转换 -> 标题去重 -> 写入飞书
+
+    参数:
+        email_data: process_email / fetch_emails 返回的邮件数据
+        data_config: DataConfig 对象
+        feishu_saver: FeishuDataSaver 对象
+        duplicate_writer: 重复记录缓冲写入器
+        ledger: IngestionLedger 对象，为None时不记录处理结果
+
+    返回:
+        tuple: (category, created_count, ok)，无有效数据时 category 为None；有记录上传失败时 ok 为False
+    """
+    category, final_items = dedup_email_items(email_data, feishu_saver, duplicate_writer, ledger)
+    if final_items is None:
+        return None, 0, True
+    return upload_email_items(email_data, category, final_items, feishu_saver, ledger)
+
+
+def main(parse_workers=None, fetch_connections=3, upload_workers=1, queue_size=4):
+    """
+    主函数
+
+    参数:
+        parse_workers: 表格附件解析进程数，默认为CPU核数
+        fetch_connections: 并行拉取邮件的IMAP连接数
+        upload_workers: 并行上传飞书的线程数
+        queue_size: 各阶段之间队列的容量（在途邮件数）
+    """
     try:
         logger.info("===== 开始处理新闻数据 =====")
-        
+
         # 初始化配置和处理器
         email_config = EmailConfig()
         data_config = DataConfig()
-        
-        # 创建邮件处理器
-        email_processor = EmailProcessor(email_config, data_config)
-        
+
+        # 创建邮件处理器：多个IMAP连接并行拉取和解析邮件
+        email_processor = IMAPConnectionPool(email_config, size=fetch_connections)
+
         # 初始化飞书配置和数据保存器
         feishu_client = build_feishu_client()
-        feishu_saver = FeishuDataSaver(feishu_client)
-        
+        # 已有记录使用本地镜像，每个表格每次运行只增量同步一次
+        feishu_saver = FeishuDataSaver(feishu_client, mirror=FeishuRecordMirror())
+        # 已入库附件台账，重跑或转发的报表直接跳过
+        ledger = IngestionLedger()
+
         # 记录更新条数
         total_updated = 0
         gn_updated = 0  # 境内更新条数
         gw_updated = 0  # 境外更新条数
-        
+
         # 登录邮箱
         if not email_processor.login():
             logger.error("邮箱登录失败，程序退出")
             return
-        
+
         # 选择收件箱
         if not email_processor.select_inbox():
             logger.error("选择收件箱失败，程序退出")
+            email_processor.close()
             return
-        
-        # 搜索邮件
-        email_ids = email_processor.search_emails()
+
+        # 按UID检查点搜索新邮件，只处理上次运行之后到达的邮件，不改变已读状态
+        checkpoint = UIDCheckpoint(f"{email_config.address}/INBOX")
+        email_ids = email_processor.search_new_email_uids(checkpoint)
         if not email_ids:
-            logger.info("无未读邮件，程序退出")
+            logger.info("无新邮件，程序退出")
+            checkpoint.complete()
+            email_processor.close()
             return
-        
+
         # 处理所有邮件
         logger.info("开始处理邮件附件")
-        
-        for email_id in email_ids:
-            logger.info(f"\n======= 处理邮件 ID: {email_id} =======")
-            
-            try:
-                # 处理单封邮件
-                email_data, status_msg = email_processor.process_email(email_id)
+
+        # 重复记录缓冲写入，退出时等待全部写入完成；表格附件在进程池中解析
+        parse_pool = AttachmentParsePool(workers=parse_workers,
+                                         projections=data_config.table_projections(NEWS_COLUMNS))
+        with feishu_saver.duplicate_writer() as duplicate_writer, parse_pool:
+            pending_titles = PendingTitles()
+
+            def dedup_stage(fetched):
+                email_id, email_data, status_msg = fetched
+                logger.info(f"\n======= 处理邮件 UID: {email_id} =======")
                 logger.info(f"邮件解析状态: {status_msg}")
-                
-                if not email_data or not email_data['tables']:
-                    logger.warning("邮件无有效表格数据，跳过")
-                    continue
-                
-                # 处理表格数据
-                items_to_process = []
-                for table in email_data['tables']:
-                    df = table['dataframe']
-                    category = email_data['category'] # 识别境内数据0还是境外数据1
-                    
-                    # 转换表格格式
-                    transformed_df = df.copy()
-                    
-                    # 设置信源类型
-                    source_type = data_config.source_type_map.get(category, '未知')
-                    transformed_df['信源类型'] = source_type
-                    
-                    # 将DataFrame转换为处理所需的格式
-                    for _, row in transformed_df.iterrows():
-                        # 动态来源
-                        news_source_name = row.get('网站名称', '')
-                        news_source_url = row.get('文章链接地址', '')
-                        
-                        # Link类型需要对象格式，且必须至少包含text或link中的一个
-                        link_text = str(news_source_name) if pd.notna(news_source_name) and news_source_name else "未知来源"
-                        link_url = str(news_source_url) if pd.notna(news_source_url) and news_source_url else ""
-                        
-                        news_source_link = {
-                            "text": link_text,
-                            "link": link_url
-                        }
-                        
-                        # 固定审核人
-                        reviewer = "尹晓丹"
-                        
-                        # 根据数据类型选择标题字段 (category: 0=境内, 1=境外)
-                        if category == 0:
-                            title_field = '标题'
-                        else:
-                            title_field = '标题(译文)'
-                        
-                        title = row.get(title_field, '')
-                        
-                        item = {
-                            'title': title,
-                            'category': category,
-                            'record': {
-                                FeishuFields.NEWS_TITLE: title,
-                                FeishuFields.NEWS_CONTENT: row.get('正文', ''),
-                                FeishuFields.NEWS_SOURCE: news_source_link,
-                                # 内容类型默认为“动态”
-                                FeishuFields.NEWS_CATEGORY: '动态',
-                                FeishuFields.REVIEWER_TEXT: reviewer  # 固定审核人
-                            }
-                        }
-                        items_to_process.append(item)
-                
-                # 1. 对邮件内的数据进行标题相似度去重
-                unique_items, _ = feishu_saver.deduplicate_by_title_similarity(items_to_process,threshold=0.5)
-                
-                # 2. 获取飞书表格中已有的记录
-                existing_records = feishu_saver.get_existing_records(category)
-                existing_titles = [record['title'] for record in existing_records if 'title' in record]
-                
-                # 3. 与飞书已有记录进行标题相似度去重
-                final_items, duplicate_items = feishu_saver.deduplicate_by_title_similarity(unique_items, existing_titles=existing_titles,threshold=0.5)
-                
-                # 4. 处理重复记录，保存到DUPLICATED_TABLE_ID表格
-                for item in duplicate_items:
-                    category_text = '境内' if item['category'] == 0 else '境外'
-                    duplicate_info = {
-                        '重复记录': f"{category_text}：{item['title']}（已有重复记录的标题：{item.get('duplicate_title', '')}）"
-                    }
-                    # 添加原文标题、动态原文、动态来源、审核人文本字段
-                    if 'record' in item:
-                        record = item['record']
-                        if FeishuFields.NEWS_TITLE in record:
-                            duplicate_info[FeishuFields.NEWS_TITLE] = record[FeishuFields.NEWS_TITLE]
-                        if FeishuFields.NEWS_CONTENT in record:
-                            duplicate_info[FeishuFields.NEWS_CONTENT] = record[FeishuFields.NEWS_CONTENT]
-                        if FeishuFields.NEWS_SOURCE in record:
-                            duplicate_info[FeishuFields.NEWS_SOURCE] = record[FeishuFields.NEWS_SOURCE]
-                        if FeishuFields.REVIEWER_TEXT in record:
-                            duplicate_info[FeishuFields.REVIEWER_TEXT] = record[FeishuFields.REVIEWER_TEXT]
-                    # 添加相似度字段
-                    if 'similarity' in item:
-                        duplicate_info['相似度'] = str(round(item['similarity'], 2))
-                    feishu_saver.save_duplicate_record(duplicate_info)
-                
-                # 5. 准备保存到飞书的数据
-                processed_data = [item['record'] for item in final_items]
-                
-                # 保存数据到飞书
-                if processed_data:
-                    logger.info(f"准备保存 {len(processed_data)} 条记录到飞书")
-                    # 根据数据类型选择表格 (category: 0=境内, 1=境外)
-                    result = feishu_saver.save_data(processed_data, data_type=category)
-                    
-                    if result:
-                        logger.info("数据保存到飞书成功")
-                        # 更新总处理条数
-                        total_updated += len(processed_data)
-                        # 根据数据类型更新对应的计数器 (category: 0=境内, 1=境外)
-                        if category == 0:
-                            gn_updated += len(processed_data)
-                        else:
-                            gw_updated += len(processed_data)
-                        # 标记邮件为已读
-                        # logger.info("标记邮件为已读")
-                        # email_processor.mark_email_as_read(email_id)
-                    else:
-                        logger.error("数据保存到飞书失败")
-                else:
-                    logger.warning("无有效数据可保存到飞书")
-                
-            except Exception as e:
-                logger.error(f"处理邮件时发生异常: {str(e)}")
-                continue
-        
+                if email_data is None:
+                    return email_id, None, None, None, False
+                try:
+                    category, final_items = dedup_email_items(email_data, feishu_saver, duplicate_writer, ledger,
+                                                              pending_titles=pending_titles, key=email_id)
+                    return email_id, email_data, category, final_items, True
+                except Exception as e:
+                    logger.error(f"处理邮件 {email_id} 时发生异常: {str(e)}")
+                    return email_id, None, None, None, False
+
+            def upload_stage(deduped):
+                email_id, email_data, category, final_items, ok = deduped
+                try:
+                    if not ok or final_items is None:
+                        return email_id, None, 0, ok
+                    return (email_id,) + upload_email_items(email_data, category, final_items, feishu_saver, ledger)
+                except Exception as e:
+                    logger.error(f"保存邮件 {email_id} 时发生异常: {str(e)}")
+                    return email_id, category, 0, False
+                finally:
+                    pending_titles.discard(email_id)
+
+            # 拉取（连接池）-> 解析（进程池）-> 去重 -> 上传，各阶段由有界队列连接，
+            # 上一封邮件去重、上传时下一封已在拉取和解析；去重需要看到之前邮件的结果，只用一个线程
+            pipeline = StagedPipeline([
+                Stage('parse', parse_pool.parse_emails, queue_size=queue_size, stream=True),
+                Stage('dedup', dedup_stage, queue_size=queue_size),
+                Stage('upload', upload_stage, workers=upload_workers, queue_size=queue_size),
+            ])
+            # 按UID批量拉取，每批一次 FETCH；附件原始内容交给进程池解析，按邮件顺序产出
+            emails = email_processor.fetch_emails(email_ids, ledger=ledger, defer_parse=True)
+            for email_id, category, created_count, ok in pipeline.run(emails):
+                if not ok:
+                    # 拉取、处理或上传失败的邮件保留在水位之后，下次运行重试
+                    checkpoint.mark_failed(email_id)
+                # 更新总处理条数
+                total_updated += created_count
+                # 根据数据类型更新对应的计数器 (category: 0=境内, 1=境外)
+                if category == 0:
+                    gn_updated += created_count
+                elif category == 1:
+                    gw_updated += created_count
+                if ok:
+                    checkpoint.advance(email_id)
+
+        # 全部成功时水位推进到本轮搜索时的 UIDNEXT
+        checkpoint.complete()
+        email_processor.close()
+
         logger.info(f"\n===== 所有新闻数据处理完成 =====")
-        logger.info(f"总共更新了 {total_updated} 条记录")
-        
+        logger.info(f"总共更新了 {total_updated} 条记录 (境内 {gn_updated} 条, 境外 {gw_updated} 条)")
+
         # 发送飞书webhook提醒
         reviewer = "尹晓丹"  # 固定审核人
         # send_feishu_webhook_notification(total_updated, gn_updated, gw_updated, reviewer)
-        
+
     except Exception as e:
         logger.error(f"程序执行异常: {str(e)}")
 
 
+def run_offline(source, workers=None):
+    """
+    离线模式：从 .eml 文件、Maildir 或包含 .eml 的目录读取邮件，多进程解析后写入飞书
+
+    参数:
+        source: 邮件文件或目录
+        workers: 解析进程数，默认为CPU核数
+    """
+    logger.info(f"===== 从离线邮件 {source} 处理新闻数据 =====")
+    data_config = DataConfig()
+
+    feishu_client = build_feishu_client()
+    feishu_saver = FeishuDataSaver(feishu_client, mirror=FeishuRecordMirror())
+    ledger = IngestionLedger()
+
+    total_updated = 0
+    gn_updated = 0  # 境内更新条数
+    gw_updated = 0  # 境外更新条数
+
+    with feishu_saver.duplicate_writer() as duplicate_writer:
+        for path, email_data, status_msg in iter_offline_emails(source, workers=workers, ledger=ledger,
+                                                              projections=data_config.table_projections(NEWS_COLUMNS)):
+            logger.info(f"\n======= 处理邮件文件: {path} =======")
+            try:
+                logger.info(f"邮件解析状态: {status_msg}")
+                category, created_count, _ = process_email_data(email_data, data_config, feishu_saver, duplicate_writer, ledger)
+                total_updated += created_count
+                if category == 0:
+                    gn_updated += created_count
+                elif category == 1:
+                    gw_updated += created_count
+            except Exception as e:
+                logger.error(f"处理邮件时发生异常: {str(e)}")
+
+    logger.info(f"\n===== 所有离线邮件处理完成 =====")
+    logger.info(f"总共更新了 {total_updated} 条记录 (境内 {gn_updated} 条, 境外 {gw_updated} 条)")
+
+
+def run_idle_daemon():
+    """常驻模式：保持IMAP IDLE连接，新邮件到达后立即处理"""
+    logger.info("===== 以IDLE常驻模式处理新闻数据 =====")
+    email_config = EmailConfig()
+    data_config = DataConfig()
+
+    feishu_client = build_feishu_client()
+    feishu_saver = FeishuDataSaver(feishu_client, mirror=FeishuRecordMirror())
+    ledger = IngestionLedger()
+
+    counters = {'total': 0, 'gn': 0, 'gw': 0}
+
+    with feishu_saver.duplicate_writer() as duplicate_writer:
+        def handle_email(email_id, email_data, status_msg):
+            logger.info(f"\n======= 处理邮件 UID: {email_id} =======")
+            logger.info(f"邮件解析状态: {status_msg}")
+            # 常驻期间飞书表格可能被人工修改，每封邮件前重新增量同步镜像
+            feishu_saver.invalidate_mirror_sync()
+            category, created_count, ok = process_email_data(email_data, data_config, feishu_saver, duplicate_writer, ledger)
+            counters['total'] += created_count
+            if category == 0:
+                counters['gn'] += created_count
+            elif category == 1:
+                counters['gw'] += created_count
+            logger.info(f"累计更新 {counters['total']} 条记录 (境内 {counters['gn']} 条, 境外 {counters['gw']} 条)")
+            return ok
+
+        checkpoint = UIDCheckpoint(f"{email_config.address}/INBOX")
+        daemon = IdleIngestionDaemon(email_config, data_config, handle_email, checkpoint=checkpoint, ledger=ledger,
+                                     projections=data_config.table_projections(NEWS_COLUMNS))
+        signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+        try:
+            daemon.run()
+        except KeyboardInterrupt:
+            daemon.stop()
+
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='读取监测邮件并写入飞书多维表格')
+    parser.add_argument('--idle', action='store_true', help='常驻运行，通过IMAP IDLE实时接收新邮件')
+    parser.add_argument('--source', help='离线模式：.eml 文件、Maildir 或包含 .eml 文件的目录')
+    parser.add_argument('--workers', type=int, default=None, help='表格附件（离线模式为邮件）的解析进程数')
+    parser.add_argument('--connections', type=int, default=3, help='并行拉取邮件的IMAP连接数')
+    parser.add_argument('--upload-workers', type=int, default=1, help='并行上传飞书的线程数')
+    parser.add_argument('--queue-size', type=int, default=4, help='流水线各阶段之间的队列容量')
+    args = parser.parse_args()
+    if args.source:
+        run_offline(args.source, workers=args.workers)
+    elif args.idle:
+        run_idle_daemon()
+    else:
+        main(parse_workers=args.workers, fetch_connections=args.connections,
+             upload_workers=args.upload_workers, queue_size=args.queue_size)
\ No newline at end of file
@@ -6,7 +6,7 @@ import logging
 # 添加当前目录到系统路径，以便导入email_tools
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from email_tools.emailUtils import connect_mail, mark_email_as_read, select_mail, search_mail, process_email, send_email_with_attachment
+from email_tools.emailUtils import connect_mail, mark_email_as_read, select_mail, search_mail, process_email, project_columns, send_email_with_attachment
 
 # 配置日志
 logging.basicConfig(
@@ -67,6 +67,28 @@ class DataConfig:
             0: '微信',
             1: '境外媒体'
         }
+        
+        # 列重命名映射：境内数据的作者名对应公众号名称
+        self.column_renames = {
+            0: {'作者名': '公众号名称'},
+            1: {}
+        }
+
+    def table_projections(self, extra_columns=()):
+        """
+        按类别生成解析表格附件时使用的列投影
+
+        参数:
+            extra_columns: 目标列之外还需要保留的列
+
+        返回:
+            dict: {category: {'columns': [...], 'renames': {...}}}
+        """
+        projections = {}
+        for category, target_columns in ((0, self.gn_target_columns), (1, self.gw_target_columns)):
+            columns = list(dict.fromkeys(list(target_columns) + list(extra_columns)))
+            projections[category] = {'columns': columns, 'renames': self.column_renames.get(category, {})}
+        return projections
 
 
 class EmailProcessor:
@@ -141,23 +163,14 @@ class EmailProcessor:
             转换后的DataFrame
         """
         try:
-            # 创建副本避免修改原数据
-            new_df = df.copy()
-            
             # 根据类别选择目标列
             target_columns = self.data_config.gw_target_columns if category == 1 else self.data_config.gn_target_columns
             
-            # 处理境内数据的特殊映射：公众号名称对应网站名称
-            if category == 0 and '作者名' in new_df.columns:
-                new_df = new_df.rename(columns={'作者名': '公众号名称'})
-            
-            # 添加缺失字段（保持原始数据不变）
-            for col in target_columns:
-                if col not in new_df.columns:
-                    new_df[col] = ''
-            
-            # 按目标顺序重新排列列
-            return new_df[target_columns]
+            # 境内数据的作者名对应公众号名称；重命名、按目标顺序选列和补齐缺失字段一步完成，不修改原数据
+            # 解析时已按列投影读取的表格，这里不会再产生副本
+            if list(df.columns) == target_columns:
+                return df
+            return project_columns(df, target_columns, self.data_config.column_renames.get(category))
         except Exception as e:
             logger.error(f"【表格转换异常】: {str(e)}")
             return None
@@ -168,7 +181,9 @@ class EmailProcessor:
         logger.info("4-1 邮件解析:")
         
         try:
-            email_data, status_msg = process_email(self.mail, email_id)
+            # 解析附件时只读取目标列
+            email_data, status_msg = process_email(self.mail, email_id,
+                                                   projections=self.data_config.table_projections())
             logger.info(f"\n{status_msg}")
             
             if not email_data: